@@ -1,9 +1,19 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 from datetime import datetime
 import data_loader
+import diagnostics
+import exports
 import financial_engine
+import incremental
+import ledger_store
+import pipeline
+import ranking
+import readjustment
+import schema
+import streaming
+import upload_cache
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -59,7 +69,8 @@ with st.sidebar:
     st.markdown("---")
     
     # Upload
-    uploaded_file = st.file_uploader("📂 Carregar Planilha (.xlsx)", type=['xlsx', 'csv'])
+    uploaded_files = st.file_uploader("📂 Carregar Planilhas (.xlsx/.csv)", type=['xlsx', 'csv'], accept_multiple_files=True,
+                                      help="Envie várias planilhas (ex.: uma por prédio) para analisá-las juntas.")
     
     # Filtros (Estado Global)
     if 'data_changed' not in st.session_state:
@@ -68,55 +79,258 @@ with st.sidebar:
     st.markdown("### ⚙️ Configurações Global")
     taxa_multa = st.number_input("Multa Atraso (%)", value=10.0, step=0.5)
     taxa_juros = st.number_input("Juros Mensais (%)", value=1.0, step=0.1)
+    modo_streaming = st.checkbox("⚡ Modo Streaming (arquivos grandes)", help="Lê o arquivo em blocos e calcula apenas os indicadores, sem carregar a planilha inteira na memória.")
+    usar_base = st.checkbox("💾 Base local (histórico)", help="Grava as planilhas e as edições num banco SQLite local e carrega só o período selecionado.")
+    mostrar_diagnostico = st.checkbox("🩺 Diagnóstico", help="Tempo, linhas e memória de cada etapa do último rerun.")
     
     st.caption("v1.5 - Correção BCB & Upload")
 
-# --- Lógica Principal ---
+def money_frame(frame):
+    """Converte a coluna Valor de um resumo do cubo (centavos) para reais."""
+    frame['Valor'] = schema.to_reais(frame['Valor'].to_numpy())
+    return frame
+
+# --- Modo Streaming ---
+@st.cache_data(max_entries=8, show_spinner=False)
+def summarize_uploads(file_keys, late_fee_percent, monthly_interest_rate, reference_day, _files, _read_options):
+    """
+    Resumo em streaming dos arquivos; os reruns (widgets) reutilizam o resultado enquanto
+    conteúdo, aba/cabeçalho (file_keys), taxas e dia de referência forem os mesmos.
+    """
+    return streaming.summarize_stream(_files, read_options=_read_options, reference_date=reference_day,
+                                      late_fee_percent=late_fee_percent, monthly_interest_rate=monthly_interest_rate)
+
+def render_streaming_dashboard(files, read_options=None):
+    """Dashboard somente leitura para planilhas maiores que a memória (KPIs incrementais)."""
+    read_options = read_options or {}
+    try:
+        with st.spinner("Processando arquivo em blocos..."):
+            summary = summarize_uploads(get_upload_keys(files, read_options), taxa_multa, taxa_juros,
+                                        pd.Timestamp.now().normalize(), files, read_options)
+    except Exception as e:
+        st.error(f"Erro ao processar dados: {e}")
+        st.stop()
+
+    st.subheader("📊 Performance Financeira")
+    st.caption(f"Modo Streaming: {summary.rows:,} parcelas processadas em blocos (edição desativada).")
+    kpi1, kpi2, kpi3 = st.columns(3)
+    kpi1.metric("💰 Receita Confirmada", f"R$ {schema.to_reais(summary.total_recebido):,.2f}", delta="Caixa Realizado")
+    kpi2.metric("🚨 Inadimplência Total", f"R$ {schema.to_reais(summary.total_divida):,.2f}", f"{summary.count_atrasados} contratos", delta_color="inverse")
+    kpi3.metric("📅 Receita Futura/Pendente", f"R$ {schema.to_reais(summary.total_pendente):,.2f}", delta="Fluxo Previsto")
+
+    if summary.count_atrasados:
+        st.error(f"🚨 **ALERTA DE COBRANÇA:** Existem {summary.count_atrasados} pagamentos atrasados! (exibindo os {len(summary.top_overdue)} mais antigos)")
+        st.dataframe(
+            schema.display_frame(summary.top_overdue),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Total Devido": st.column_config.NumberColumn("Valor Atualizado", format="R$ %.2f"),
+                "Dias Atraso": st.column_config.ProgressColumn("Gravidade (Dias)", format="%d dias", min_value=0, max_value=90, help="Barra vermelha indica maior atraso")
+            }
+        )
+    else:
+        st.success("✅ Tudo em dia! Nenhum pagamento atrasado identificado.")
+
+    import plotly.express as px
+    g1, g2 = st.columns(2)
+    color_map = {'Pago': '#27AE60', 'Atrasado': '#E74C3C', 'Pendente': '#F1C40F'}
+    with g1:
+        fig_status = px.pie(money_frame(summary.cube.status_frame()), names='Status', values='Valor', hole=0.4,
+                            title="Distribuição da Carteira (Por Valor)",
+                            color='Status', color_discrete_map=color_map)
+        st.plotly_chart(fig_status, use_container_width=True)
+    with g2:
+        fig_time = px.bar(money_frame(summary.cube.timeline_frame()), x='Mes', y='Valor', color='Status',
+                          title="Cronograma de Vencimentos", color_discrete_map=color_map)
+        st.plotly_chart(fig_time, use_container_width=True)
+
+# --- Carregamento com Cache ---
+@st.cache_resource
+def get_upload_cache():
+    """Cache compartilhado entre sessões dos arquivos já processados (memória; Parquet se configurado)."""
+    return upload_cache.UploadCache(disk_dir=upload_cache.disk_cache_dir())
+
+@st.cache_resource
+def get_ledger_store():
+    """Base local (SQLite) das parcelas, compartilhada entre sessões."""
+    return ledger_store.LedgerStore()
+
+def select_store_period(store):
+    """
+    Período de vencimentos exibido com a base local ativa; só essas parcelas são consultadas.
+    A consulta é refeita quando o período muda ou quando um upload grava novos dados.
+    """
+    bounds = store.bounds()
+    if bounds is not None:
+        lo, hi = bounds[0].date(), bounds[1].date()
+        default_start = min(max(lo, (pd.Timestamp.now() - pd.DateOffset(months=12)).date()), hi)
+        periodo = st.sidebar.date_input("Período (Vencimento)", value=(default_start, hi), min_value=lo, max_value=hi,
+                                        key='store_period', format="DD/MM/YYYY")
+        if len(periodo) != 2:
+            # Seleção pela metade (só a data inicial): mantém o período anterior
+            periodo = st.session_state.get('store_period_applied', (default_start, hi))
+        st.session_state['store_period_applied'] = periodo
+    elif store.count():
+        # Só parcelas sem vencimento: não há período a escolher
+        periodo = (None, None)
+    else:
+        return None
+    query_key = (tuple(periodo), st.session_state.get('store_version', 0))
+    if st.session_state.get('store_query_key') != query_key:
+        st.session_state['store_df'] = store.query(*periodo)
+        st.session_state['store_query_key'] = query_key
+    undated = store.count_undated()
+    st.sidebar.caption(f"Base local: {store.count():,} parcelas · {len(st.session_state['store_df']):,} no período"
+                       + (f" (inclui {undated:,} sem vencimento)" if undated else ""))
+    return st.session_state['store_df']
+
+@st.cache_resource
+def get_export_cache():
+    """Arquivos exportados, compartilhados entre sessões e indexados pelo hash dos dados."""
+    return exports.ExportCache()
+
+def get_upload_key(file):
+    """Hash do conteúdo do upload, calculado uma vez por arquivo enviado."""
+    digests = st.session_state.setdefault('upload_digests', {})
+    file_id = getattr(file, 'file_id', None) or file.name
+    if file_id not in digests:
+        digests[file_id] = upload_cache.file_digest(file)
+    return digests[file_id]
+
+def get_upload_keys(files, read_options):
+    """Chaves dos uploads; a aba/cabeçalho entram na chave (cada leitura da planilha é uma variante)."""
+    return tuple(upload_cache.variant_key(get_upload_key(f), **read_options.get(label, {}))
+                 for f, label in zip(files, pipeline.source_labels(files)))
+
+def get_sheet_names(file):
+    """Abas de um upload XLSX, lidas uma vez por arquivo enviado."""
+    sheets = st.session_state.setdefault('upload_sheets', {})
+    file_id = getattr(file, 'file_id', None) or file.name
+    if file_id not in sheets:
+        sheets[file_id] = data_loader.list_sheets(file)
+    return sheets[file_id]
+
+def select_excel_options(files):
+    """
+    Aba e linha do cabeçalho de cada planilha XLSX enviada.
+    Retorna {rótulo do arquivo (pipeline.source_labels): opções de leitura} (vazio se não há XLSX).
+    """
+    workbooks = [(f, label) for f, label in zip(files, pipeline.source_labels(files))
+                 if f.name.lower().endswith('.xlsx')]
+    if not workbooks:
+        return {}
+    options = {}
+    with st.sidebar.expander("📑 Planilhas Excel", expanded=False):
+        for f, label in workbooks:
+            file_id = getattr(f, 'file_id', None) or label
+            try:
+                sheets = get_sheet_names(f)
+            except data_loader.DataLoadError as e:
+                st.error(f"❌ {label}: {e}")
+                continue
+            aba = st.selectbox(f"Aba — {label}", sheets, key=f"sheet_{file_id}")
+            linha = st.number_input(f"Linha do cabeçalho — {label}", min_value=1, value=1, step=1,
+                                    key=f"header_{file_id}")
+            options[label] = {'sheet_name': aba, 'header_row': int(linha) - 1}
+    return options
+
+def parse_uploads(files, keys, read_options=None):
+    """
+    Lê, normaliza e tipa os arquivos enviados que ainda não estão no cache (em paralelo)
+    e mescla as carteiras quando há mais de um arquivo. Erros por arquivo ficam em
+    session_state['upload_errors']; interrompe o app se nenhum arquivo puder ser usado.
+    """
+    cache = get_upload_cache()
+    labels = pipeline.source_labels(files)
+    frames = [cache.get(k) for k in keys]
+    pending = [i for i, df in enumerate(frames) if df is None]
+    parsed, errors = pipeline.load_ledgers([files[i] for i in pending], read_options=read_options,
+                                           labels=[labels[i] for i in pending])
+    for i, df in zip(pending, parsed):
+        if df is not None:
+            cache.put(keys[i], df)
+            frames[i] = df
+    st.session_state['upload_errors'] = errors
+
+    available = [(label, df) for label, df in zip(labels, frames) if df is not None]
+    if not available:
+        for name, message in errors.items():
+            st.error(f"❌ Erro em {name}: {message}")
+        st.stop()
+    if len(files) == 1:
+        return available[0][1]
+    return pipeline.merge_ledgers(available)
+
+def get_ledger(source_df):
+    """Carteira incremental da sessão; é reconstruída só quando os dados, as taxas ou o dia mudam."""
+    hoje = pd.Timestamp.now()
+    ledger_key = (st.session_state.get('main_df_key'), id(source_df), taxa_multa, taxa_juros, hoje.date())
+    if st.session_state.get('ledger_key') != ledger_key:
+        with diagnostics.stage('ledger_build', rows=len(source_df)):
+            st.session_state['ledger'] = incremental.IncrementalLedger(
+                source_df, reference_date=hoje, late_fee_percent=taxa_multa, monthly_interest_rate=taxa_juros
+            )
+        st.session_state['ledger_key'] = ledger_key
+    return st.session_state['ledger']
+
 # --- Lógica Principal ---
 def main():
     # Inicialização do Estado (Persistência)
     if 'main_df' not in st.session_state:
         st.session_state['main_df'] = None
     
+    # Planilhas XLSX: aba e linha do cabeçalho escolhidas na barra lateral
+    excel_options = select_excel_options(uploaded_files or [])
+
+    if uploaded_files and modo_streaming:
+        render_streaming_dashboard(uploaded_files, excel_options)
+        return
+
     # 1. Carregamento e Processamento Inicial
-    if uploaded_file:
-        # Se mudou o arquivo ou ainda não processou
-        # Check simples: se temos arquivo mas o df no state é None ou diferente (seria complexo checar diff, assumimos reload)
-        # Para evitar reload a cada interação, usamos o cache do data_loader, mas precisamos colocar no session_state
-        
-        # Carrega brutos
-        raw_df = data_loader.load_data(uploaded_file)
-        
-        if raw_df is not None:
-             # Normaliza
-            norm_df = data_loader.smart_normalize_columns(raw_df)
-            
-            # Validação Básica
-            required_cols = ['Inquilino', 'Vencimento', 'Valor']
-            missing = [c for c in required_cols if c not in norm_df.columns]
-            
-            if missing:
-                st.error(f"❌ Erro: Colunas faltando: {', '.join(missing)}")
-                st.stop()
-            
-            # Padronização de Tipos (Sempre que carregar novo arquivo)
-            try:
-                norm_df['Vencimento'] = pd.to_datetime(norm_df['Vencimento'], errors='coerce', dayfirst=True, format='mixed')
-                if norm_df['Valor'].dtype == object:
-                     norm_df['Valor'] = norm_df['Valor'].astype(str).str.replace('R$', '').str.replace('.', '').str.replace(',', '.').str.strip()
-                norm_df['Valor'] = pd.to_numeric(norm_df['Valor'], errors='coerce').fillna(0.0)
-                if 'Status' not in norm_df.columns:
-                    norm_df['Status'] = 'Pendente'
-            except Exception as e:
-                st.error(f"Erro ao processar dados: {e}")
-                st.stop()
-                
-            # Salva no Session State APENAS SE FOR A PRIMEIRA VEZ DESSA SESSÃO OU UPLOAD
-            # Para permitir persistência das edições, só sobrescrevemos se o usuário acabou de subir o arquivo (interação do uploader)
-            # Como o uploader limpa no refresh, se ele está aqui é porque foi enviado agora.
-            st.session_state['main_df'] = norm_df
-
-    elif st.session_state['main_df'] is None:
+    if uploaded_files:
+        # Cada widget dispara um rerun: só processa os arquivos se o conteúdo mudou,
+        # preservando o DataFrame (e as edições) da sessão
+        with diagnostics.stage('upload_hash'):
+            # A aba/cabeçalho entram na chave: cada leitura da planilha é convertida uma vez
+            file_keys = get_upload_keys(uploaded_files, excel_options)
+        if st.session_state.get('main_df_key') != file_keys:
+            st.session_state['main_df'] = parse_uploads(uploaded_files, file_keys, excel_options)
+            st.session_state['main_df_key'] = file_keys
+
+        for name, message in st.session_state.get('upload_errors', {}).items():
+            st.error(f"❌ {name} ignorado: {message}")
+
+        if st.session_state['main_df'] is not None:
+            duplicates = st.session_state['main_df'].attrs.get('duplicates', 0)
+            if duplicates:
+                main_df = st.session_state['main_df']
+                st.warning(f"⚠️ {duplicates} parcelas duplicadas na carteira mesclada (mesmo Inquilino, Imóvel e Vencimento).")
+                with st.expander("Ver duplicadas"):
+                    st.dataframe(schema.display_frame(main_df[pipeline.duplicate_mask(main_df)].head(500)),
+                                 use_container_width=True, hide_index=True)
+                    if st.button("Remover duplicadas (mantém a primeira ocorrência)"):
+                        deduped = main_df[~pipeline.duplicate_mask(main_df, keep='first')].reset_index(drop=True)
+                        deduped.attrs['duplicates'] = 0
+                        st.session_state['main_df'] = deduped
+                        st.rerun()
+
+            dialect = st.session_state['main_df'].attrs.get('csv_dialect')
+            if dialect:
+                sep_label = {'\t': 'TAB'}.get(dialect['sep'], dialect['sep'] or 'auto')
+                st.sidebar.caption(f"CSV lido como {dialect['encoding']} · separador '{sep_label}'")
+
+            # Perfil de layout: fixa o mapeamento de colunas para planilhas com os mesmos cabeçalhos
+            source_columns = st.session_state['main_df'].attrs.get('source_columns')
+            if source_columns:
+                with st.sidebar.expander("🧭 Perfil de Layout"):
+                    st.json(st.session_state['main_df'].attrs.get('column_mapping', {}))
+                    layout_name = st.text_input("Nome do perfil", value=uploaded_files[0].name.rsplit('.', 1)[0])
+                    if st.button("Salvar perfil"):
+                        data_loader.save_layout_profile(layout_name, source_columns, st.session_state['main_df'].attrs.get('column_mapping', {}))
+                        st.success("Perfil salvo.")
+
+    elif st.session_state['main_df'] is None and not (usar_base and get_ledger_store().count()):
         # Carrega dados de exemplo se não tiver nada
         st.info("ℹ️ Modo Demonstração (Carregue seu arquivo na lateral)")
         data = {
@@ -129,20 +343,27 @@ def main():
         }
         ex_df = pd.DataFrame(data)
         ex_df['Vencimento'] = pd.to_datetime(ex_df['Vencimento'])
-        st.session_state['main_df'] = ex_df
+        st.session_state['main_df'] = schema.compact(ex_df)
+
+    # 1.1 Base local: uploads são gravados (upsert) e o dashboard lê só o período selecionado
+    source_df = st.session_state['main_df']
+    if usar_base:
+        store = get_ledger_store()
+        if uploaded_files and source_df is not None and st.session_state.get('stored_key') != st.session_state.get('main_df_key'):
+            inserted, updated = store.upsert(source_df)
+            st.session_state['stored_key'] = st.session_state['main_df_key']
+            st.session_state['store_version'] = st.session_state.get('store_version', 0) + 1
+            st.sidebar.success(f"Base local: {inserted:,} parcelas novas, {updated:,} atualizadas.")
+        stored_df = select_store_period(store)
+        if stored_df is not None:
+            source_df = stored_df
 
     # 2. Fluxo Principal (Trabalha sempre com o Session State)
-    if st.session_state['main_df'] is not None:
-        df = st.session_state['main_df'].copy()
-        
+    if source_df is not None:
         # --- Cálculos Preliminares (para mostrar na tabela) ---
-        hoje = pd.Timestamp.now()
-        df['Dias Atraso'] = (hoje - df['Vencimento']).dt.days
-        df['Dias Atraso'] = df.apply(lambda x: max(0, x['Dias Atraso']) if x.get('Status') != 'Pago' else 0, axis=1)
-        
-        df['Multa Est.'] = df.apply(lambda x: financial_engine.calculate_late_fee(x['Valor'], taxa_multa) if x['Dias Atraso'] > 0 else 0, axis=1)
-        df['Juros Est.'] = df.apply(lambda x: financial_engine.calculate_interest(x['Valor'], x['Dias Atraso'], taxa_juros) if x['Dias Atraso'] > 0 else 0, axis=1)
-        df['Total Devido'] = df['Valor'] + df['Multa Est.'] + df['Juros Est.']
+        # Colunas derivadas e totais são calculados uma vez; os reruns só aplicam as edições
+        ledger = get_ledger(source_df)
+        df = ledger.view
 
         # --- Interface ---
         
@@ -150,95 +371,127 @@ def main():
         st.subheader("📋 Painel de Controle")
         st.caption("Edite os dados abaixo (Status, Datas) e veja os resultados atualizarem automaticamente.")
         
-        edited_df = st.data_editor(
-            df,
-            column_config={
-                "Valor": st.column_config.NumberColumn("Valor Original", format="R$ %.2f"),
-                "Multa Est.": st.column_config.NumberColumn("Multa", format="R$ %.2f", disabled=True),
-                "Juros Est.": st.column_config.NumberColumn("Juros", format="R$ %.2f", disabled=True),
-                "Total Devido": st.column_config.NumberColumn("Total Cobrar", format="R$ %.2f", disabled=True),
-                "Vencimento": st.column_config.DateColumn("Vencimento", format="DD/MM/YYYY"),
-                "Status": st.column_config.SelectboxColumn("Status", options=["Pago", "Pendente", "Atrasado"], required=True)
-            },
-            hide_index=True,
-            use_container_width=True,
-            num_rows="dynamic",
-            key="editor_main" # Key importante para cache do widget
-        )
+        with diagnostics.stage('data_editor', rows=len(df)):
+            edited_df = st.data_editor(
+                df,
+                column_config={
+                    "Valor": st.column_config.NumberColumn("Valor Original", format="R$ %.2f"),
+                    "Multa Est.": st.column_config.NumberColumn("Multa", format="R$ %.2f", disabled=True),
+                    "Juros Est.": st.column_config.NumberColumn("Juros", format="R$ %.2f", disabled=True),
+                    "Total Devido": st.column_config.NumberColumn("Total Cobrar", format="R$ %.2f", disabled=True),
+                    "Vencimento": st.column_config.DateColumn("Vencimento", format="DD/MM/YYYY"),
+                    "Status": st.column_config.SelectboxColumn("Status", options=["Pago", "Pendente", "Atrasado"], required=True),
+                    pipeline.SOURCE_COLUMN: st.column_config.Column("Arquivo", disabled=True),
+                    schema.ID_COLUMN: None
+                },
+                hide_index=True,
+                use_container_width=True,
+                num_rows="dynamic",
+                key="editor_main" # Key importante para cache do widget
+            )
 
-        # Atualiza o session state com as edições para persistir se recarregar algo
-        # (Opcional, mas bom para manter sincronia se tivermos outros inputs)
+        # Aplica somente o delta de edições (linhas alteradas/adicionadas/excluídas)
+        with diagnostics.stage('apply_delta'):
+            changes = ledger.apply_delta(st.session_state.get('editor_main'))
+            edited_df = ledger.patch_derived(edited_df)
+        # Edições sobre dados da base local são gravadas na hora (write-through)
+        if usar_base and schema.ID_COLUMN in ledger.base.columns and not changes.empty:
+            with diagnostics.stage('store_write'):
+                get_ledger_store().write_through(changes)
+        aggregates = ledger.aggregates
         
         # --- 3. Dashboard Analítico (Usa o EDITED_DF) ---
         
         st.markdown("---")
         st.subheader("📊 Performance Financeira")
         
-        # Fazer cálculos finais sobre o DF EDITADO
-        # Recalcula totais para garantir precisão pós-edição
-        total_recebido = edited_df[edited_df['Status'] == 'Pago']['Valor'].sum()
+        with diagnostics.stage('kpis'):
+            # Totais mantidos incrementalmente (refletem as edições sem varrer a tabela)
+            total_recebido = schema.to_reais(aggregates.status_total('Pago'))
         
-        # Inadimplência Real (Total Devido atualizado)
-        df_atrasados = edited_df[edited_df['Status'] == 'Atrasado'].copy()
-        total_divida = df_atrasados['Total Devido'].sum()
-        count_atrasados = len(df_atrasados)
+            # Inadimplência Real (Total Devido atualizado)
+            df_atrasados = ledger.overdue_frame()
+            total_divida = schema.to_reais(aggregates.overdue_total)
+            count_atrasados = aggregates.overdue_count
         
-        total_pendente = edited_df[edited_df['Status'] == 'Pendente']['Valor'].sum()
+            total_pendente = schema.to_reais(aggregates.status_total('Pendente'))
 
-        kpi1, kpi2, kpi3 = st.columns(3)
-        kpi1.metric("💰 Receita Confirmada", f"R$ {total_recebido:,.2f}", delta="Caixa Realizado")
-        kpi2.metric("🚨 Inadimplência Total", f"R$ {total_divida:,.2f}", f"{count_atrasados} contratos", delta_color="inverse")
-        kpi3.metric("📅 Receita Futura/Pendente", f"R$ {total_pendente:,.2f}", delta="Fluxo Previsto")
+            kpi1, kpi2, kpi3 = st.columns(3)
+            kpi1.metric("💰 Receita Confirmada", f"R$ {total_recebido:,.2f}", delta="Caixa Realizado")
+            kpi2.metric("🚨 Inadimplência Total", f"R$ {total_divida:,.2f}", f"{count_atrasados} contratos", delta_color="inverse")
+            kpi3.metric("📅 Receita Futura/Pendente", f"R$ {total_pendente:,.2f}", delta="Fluxo Previsto")
         
         # --- 4. Hall of Shame (Devedores) ---
-        if not df_atrasados.empty:
-            st.error(f"🚨 **ALERTA DE COBRANÇA:** Existem {count_atrasados} pagamentos atrasados!")
-            
-            # Mostra apenas colunas relevantes
-            cols_show = ['Inquilino', 'Imóvel', 'Vencimento', 'Dias Atraso', 'Valor', 'Total Devido']
-            # Garante que as colunas existem
-            cols_final = [c for c in cols_show if c in df_atrasados.columns]
+        with diagnostics.stage('overdue_table', rows=len(df_atrasados)):
+            if not df_atrasados.empty:
+                st.error(f"🚨 **ALERTA DE COBRANÇA:** Existem {count_atrasados} pagamentos atrasados!")
             
-            st.dataframe(
-                df_atrasados[cols_final].sort_values('Dias Atraso', ascending=False),
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "Total Devido": st.column_config.NumberColumn("Valor Atualizado", format="R$ %.2f"),
-                    "Dias Atraso": st.column_config.ProgressColumn("Gravidade (Dias)", format="%d dias", min_value=0, max_value=90, help="Barra vermelha indica maior atraso")
-                }
-            )
-        else:
-            st.success("✅ Tudo em dia! Nenhum pagamento atrasado identificado.")
+                # Mostra apenas colunas relevantes
+                cols_show = ['Inquilino', 'Imóvel', 'Vencimento', 'Dias Atraso', 'Valor', 'Total Devido']
+                # Garante que as colunas existem
+                cols_final = [c for c in cols_show if c in df_atrasados.columns]
+
+                # Ranking por seleção parcial: só a página atual é ordenada e enviada ao navegador
+                r1, r2, r3 = st.columns(3)
+                ordem = r1.selectbox("Ordenar por", ranking.RANK_KEYS, key='rank_key')
+                agrupar = r2.selectbox("Agrupar por", ranking.GROUP_OPTIONS, key='rank_group')
+                por_pagina = r3.selectbox("Linhas por página", [25, 50, 100, 250], index=1, key='rank_page_size')
+                ranked = ranking.OverdueRanking(df_atrasados[cols_final], key=ordem, group_by=agrupar, page_size=por_pagina)
+                pagina = 1
+                if ranked.pages > 1:
+                    pagina = st.number_input(f"Página (de {ranked.pages})", min_value=1, max_value=ranked.pages, value=1, key='rank_page')
+
+                st.dataframe(
+                    schema.display_frame(ranked.page(pagina)),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Valor": st.column_config.NumberColumn("Valor Original", format="R$ %.2f"),
+                        "Total Devido": st.column_config.NumberColumn("Valor Atualizado", format="R$ %.2f"),
+                        "Dias Atraso": st.column_config.ProgressColumn("Gravidade (Dias)", format="%d dias", min_value=0, max_value=90, help="Barra vermelha indica maior atraso")
+                    }
+                )
+                st.caption(f"{len(ranked):,} {'parcelas' if agrupar == 'Parcela' else 'devedores'} em atraso · página {pagina} de {ranked.pages}")
+            else:
+                st.success("✅ Tudo em dia! Nenhum pagamento atrasado identificado.")
 
         # --- 5. Gráficos ---
-        g1, g2 = st.columns(2)
+        with diagnostics.stage('charts'):
+            # plotly só é carregado quando há gráfico para desenhar (inicialização mais rápida)
+            import plotly.express as px
+            g1, g2 = st.columns(2)
         
-        with g1:
-            # Gráfico de Pizza ou Barra Stacked para Status
-            fig_status = px.pie(edited_df, names='Status', values='Valor', hole=0.4, 
-                                title="Distribuição da Carteira (Por Valor)",
-                                color='Status',
-                                color_discrete_map={'Pago': '#27AE60', 'Atrasado': '#E74C3C', 'Pendente': '#F1C40F'})
-            st.plotly_chart(fig_status, use_container_width=True)
+            with g1:
+                # Gráfico de Pizza ou Barra Stacked para Status
+                fig_status = px.pie(money_frame(aggregates.status_frame()), names='Status', values='Valor', hole=0.4, 
+                                    title="Distribuição da Carteira (Por Valor)",
+                                    color='Status',
+                                    color_discrete_map={'Pago': '#27AE60', 'Atrasado': '#E74C3C', 'Pendente': '#F1C40F'})
+                st.plotly_chart(fig_status, use_container_width=True)
             
-        with g2:
-             # Evolução temporal
-             edited_df['Mes'] = edited_df['Vencimento'].dt.strftime('%Y-%m')
-             df_timeline = edited_df.groupby(['Mes', 'Status'])['Valor'].sum().reset_index()
-             fig_time = px.bar(df_timeline, x='Mes', y='Valor', color='Status', 
-                               title="Cronograma de Vencimentos",
-                               color_discrete_map={'Pago': '#27AE60', 'Atrasado': '#E74C3C', 'Pendente': '#F1C40F'})
-             st.plotly_chart(fig_time, use_container_width=True)
+            with g2:
+                 # Evolução temporal
+                 df_timeline = money_frame(aggregates.timeline_frame())
+                 fig_time = px.bar(df_timeline, x='Mes', y='Valor', color='Status', 
+                                   title="Cronograma de Vencimentos",
+                                   color_discrete_map={'Pago': '#27AE60', 'Atrasado': '#E74C3C', 'Pendente': '#F1C40F'})
+                 st.plotly_chart(fig_time, use_container_width=True)
 
         # --- 6. Exportação e Ferramentas ---
         c_exp, c_calc = st.columns([1,1])
         with c_exp:
+            formato = st.selectbox("Formato", list(exports.EXPORT_FORMATS), key='export_format')
+            somente_inadimplentes = st.checkbox("Somente inadimplentes", key='export_overdue')
+            export_df = df_atrasados if somente_inadimplentes else edited_df
+            spec = exports.EXPORT_FORMATS[formato]
+            prefixo = 'relatorio_inadimplentes' if somente_inadimplentes else 'relatorio_geral'
+            # O arquivo só é gerado no clique (fora do rerun) e fica em cache pelo hash dos dados
             st.download_button(
                 label="📥 Baixar Relatório Completo",
-                data=edited_df.to_csv(index=False).encode('utf-8'),
-                file_name=f'relatorio_geral_{datetime.now().strftime("%d%m%Y")}.csv',
-                mime='text/csv'
+                data=lambda: get_export_cache().export(export_df, formato),
+                file_name=f'{prefixo}_{datetime.now().strftime("%d%m%Y")}{spec.extension}',
+                mime=spec.mime,
+                on_click='ignore'
             )
         
         with c_calc:
@@ -249,6 +502,22 @@ def main():
                 p = st.number_input("Meses", 12)
                 st.code(f"Parcela: R$ {financial_engine.financial_calculator(t/100/12, p, v)*-1:,.2f}")
 
+                # Sensibilidade Taxa × Prazo (uma única chamada vetorizada)
+                st.write("**Sensibilidade (Taxa Anual × Meses)**")
+                taxas = np.clip(t + np.arange(-2.0, 2.5, 1.0), 0.0, None)
+                prazos = sorted({int(p), 12, 24, 36, 48, 60})
+                grid = financial_engine.scenario_grid(taxas / 100 / 12, prazos, v)
+                grid.index = [f"{x:.2f}%" for x in taxas]
+                st.dataframe(grid.style.format("R$ {:,.2f}"), use_container_width=True)
+
+                sistema = st.radio("Sistema de Amortização", ["Price", "SAC"], horizontal=True)
+                st.dataframe(
+                    financial_engine.amortization_schedule(t/100/12, p, v, system=sistema.lower()),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={c: st.column_config.NumberColumn(c, format="R$ %.2f") for c in ['Prestação', 'Juros', 'Amortização', 'Saldo Devedor']}
+                )
+
         # BCB (Mantido)
         st.markdown("---")
         if st.checkbox("Exibir Indicadores Econômicos (BCB)"):
@@ -259,13 +528,87 @@ def main():
                         try:
                             start = (pd.Timestamp.now() - pd.DateOffset(months=12)).strftime('%Y-%m-%d')
                             s = data_loader.get_inflation_index('IPCA', start)
-                            if s is not None:
-                                val = s.sum()
-                                if isinstance(val, pd.Series): val = val.iloc[0]
+                            if s is not None and not s.empty:
+                                # Acumulado composto (não a soma simples das taxas mensais)
+                                val = readjustment.IndexTable.from_series(s).accumulated(12)
                                 st.metric("IPCA 12 Meses", f"{val:.2f}%")
                                 st.line_chart(s)
                         except Exception as e:
                             st.error(f"Erro BCB: {e}")
 
+             with col_bcb2:
+                indice = st.selectbox("Índice de Reajuste", ["IPCA", "IGP-M"],
+                                      help="Usado nas linhas sem índice próprio (coluna Índice)")
+                # Sem coluna de aniversário, aplica correção monetária desde o vencimento
+                aniversario = readjustment.ANNIVERSARY_COLUMN
+                date_col = aniversario if aniversario in edited_df.columns else 'Vencimento'
+                if st.button("Simular Reajuste da Carteira"):
+                    with st.spinner("Calculando reajustes..."):
+                        try:
+                            import inflation_store
+                            base_dates = pd.to_datetime(edited_df[date_col], errors='coerce')
+                            # Uma tabela por índice presente na carteira (nomes comparados sem caixa/hífen)
+                            usados = readjustment.resolve_indices(edited_df, list(inflation_store.SERIES_CODES),
+                                                                  default_index=indice)
+                            tables = {}
+                            for nome in usados.dropna().unique():
+                                s = data_loader.get_inflation_index(nome, base_dates.min())
+                                if s is not None and not s.empty:
+                                    tables[nome] = readjustment.IndexTable.from_series(s)
+                            if tables:
+                                reaj = readjustment.readjust_portfolio(
+                                    edited_df.assign(**{date_col: base_dates}), tables,
+                                    date_col=date_col, default_index=indice
+                                )
+                                sem_fator = reaj['Fator Reajuste'].isna()
+                                if sem_fator.any():
+                                    coluna_indice = readjustment.INDEX_COLUMN
+                                    nomes = (sorted(set(edited_df.loc[sem_fator, coluna_indice].astype(str)))
+                                             if coluna_indice in edited_df.columns else [indice])
+                                    st.warning(f"⚠️ {int(sem_fator.sum())} contrato(s) sem reajuste: índice desconhecido "
+                                               f"ou sem dados do BCB ({', '.join(nomes)}).")
+                                cols_reaj = [c for c in ['Inquilino', 'Imóvel', date_col, 'Valor'] if c in edited_df.columns]
+                                st.dataframe(
+                                    edited_df[cols_reaj].join(reaj),
+                                    use_container_width=True,
+                                    hide_index=True,
+                                    column_config={
+                                        "Valor Reajustado": st.column_config.NumberColumn("Valor Reajustado", format="R$ %.2f"),
+                                        "Fator Reajuste": st.column_config.NumberColumn("Fator", format="%.4f"),
+                                    }
+                                )
+                        except Exception as e:
+                            st.error(f"Erro BCB: {e}")
+
+def render_diagnostics(run, profile):
+    """Painel "Diagnóstico": etapas do rerun atual e captura opcional de perfil (cProfile)."""
+    if profile.report:
+        st.session_state['profile_report'] = profile.report
+    with st.sidebar.expander("🩺 Diagnóstico", expanded=True):
+        st.caption(f"Rerun em {run.total_seconds:.3f}s · {len(run.records)} etapas medidas")
+        st.dataframe(
+            run.frame(),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Tempo (s)": st.column_config.NumberColumn(format="%.4f"),
+                "Memória Δ (MB)": st.column_config.NumberColumn(format="%.1f"),
+            }
+        )
+        # O clique dispara um rerun; esse rerun inteiro é perfilado (ver profile_rerun)
+        st.button("Capturar perfil (cProfile) deste rerun", key='diag_profile')
+        if st.session_state.get('profile_report'):
+            st.download_button(
+                label="📥 Baixar perfil",
+                data=st.session_state['profile_report'].encode('utf-8'),
+                file_name=f'perfil_{datetime.now().strftime("%d%m%Y_%H%M%S")}.txt',
+                mime='text/plain'
+            )
+
 if __name__ == "__main__":
-    main()
+    diagnostics.configure_logging()
+    profile_rerun = mostrar_diagnostico and st.session_state.get('diag_profile', False)
+    with diagnostics.recording() as run, diagnostics.profiling(enabled=profile_rerun) as profile:
+        main()
+    if mostrar_diagnostico:
+        render_diagnostics(run, profile)
@@ -0,0 +1,172 @@
+"""
+Benchmark do pipeline de carga e cálculo, etapa por etapa.
+
+Uso:
+    python benchmark.py [--linhas 10000 100000] [--formatos csv xlsx] [--repeticoes 3]
+                        [-o resultado.json] [--comparar anterior.json]
+
+Para cada tamanho/formato gera (ou reaproveita) uma carteira sintética e mede o tempo
+e o pico de memória de: load_data, smart_normalize_columns, coerção de tipos, esquema
+compacto, cálculo de atrasos e agregação. O resultado é gravado em JSON para comparar
+versões (--comparar mostra a razão nova/antiga de cada etapa).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import pipeline
+import schema
+import synthetic
+from cube import AggregateCube
+
+DEFAULT_DIR = Path(__file__).resolve().parent / '.data' / 'benchmarks'
+REFERENCE_DATE = pd.Timestamp('2026-01-01')
+SUFFIXES = {'csv': '.csv', 'csv-latin1': '.csv', 'xlsx': '.xlsx'}
+
+
+def _stages(path: Path) -> list:
+    """Etapas do pipeline na ordem; cada uma recebe a saída da anterior."""
+    def load(_):
+        with open(path, 'rb') as fh:
+            return data_loader.load_data(fh)
+
+    return [
+        ('load_data', load),
+        ('smart_normalize_columns', data_loader.smart_normalize_columns),
+        ('coerce_types', data_loader.coerce_types),
+        ('compact', schema.compact),
+        ('arrears', lambda df: pipeline.add_derived_columns(df, REFERENCE_DATE, 10.0, 1.0)),
+        ('aggregate', AggregateCube.from_frame),
+    ]
+
+
+def run_pipeline(path: Path, trace_memory: bool = False) -> dict:
+    """
+    Executa as etapas uma vez. Retorna {etapa: segundos} ou, com trace_memory,
+    {etapa: pico de memória alocada em bytes} (tracemalloc, medido numa passada à parte
+    porque o rastreamento atrasa as etapas com muitos objetos Python).
+    """
+    result, data = {}, None
+    for name, func in _stages(path):
+        if trace_memory:
+            tracemalloc.start()
+            data = func(data)
+            result[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            data = func(data)
+            result[name] = time.perf_counter() - start
+    return result
+
+
+def prepare_input(rows: int, fmt: str, seed: int = 0, directory: Path = DEFAULT_DIR) -> Path:
+    """Carteira sintética em disco, reaproveitada entre execuções com os mesmos parâmetros."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"carteira_{rows}_{fmt}_{seed}{SUFFIXES[fmt]}"
+    if not path.exists():
+        synthetic.write_ledger(synthetic.generate_ledger(rows, seed=seed), path, fmt)
+    return path
+
+
+def benchmark(rows: int, fmt: str, repeat: int = 3, seed: int = 0, memory: bool = True) -> dict:
+    """Mede um tamanho/formato: melhor tempo de `repeat` execuções e pico de memória por etapa."""
+    if fmt == 'xlsx':
+        rows = min(rows, synthetic.XLSX_MAX_ROWS)
+    path = prepare_input(rows, fmt, seed)
+    runs = [run_pipeline(path) for _ in range(repeat)]
+    stages = {name: {'seconds': min(r[name] for r in runs),
+                     'median_seconds': float(np.median([r[name] for r in runs]))}
+              for name in runs[0]}
+    if memory:
+        for name, peak in run_pipeline(path, trace_memory=True).items():
+            stages[name]['peak_bytes'] = int(peak)
+    return {
+        'rows': rows,
+        'format': fmt,
+        'file_bytes': path.stat().st_size,
+        'total_seconds': sum(s['seconds'] for s in stages.values()),
+        'stages': stages,
+    }
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git': _git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor() or None,
+    }
+
+
+def compare(new: dict, old: dict) -> list:
+    """Linhas (linhas, formato, etapa, tempo antigo, tempo novo, razão) para os casos presentes nos dois resultados."""
+    old_cases = {(c['rows'], c['format']): c for c in old['results']}
+    rows = []
+    for case in new['results']:
+        previous = old_cases.get((case['rows'], case['format']))
+        if previous is None:
+            continue
+        for stage, stats in case['stages'].items():
+            before = previous['stages'].get(stage, {}).get('seconds')
+            if before:
+                rows.append((case['rows'], case['format'], stage, before, stats['seconds'], stats['seconds'] / before))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline da carteira de aluguéis.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=synthetic.SIZES[:3],
+                        help="Tamanhos das carteiras (padrão: 10k 100k 1M; use 10000000 para 10M)")
+    parser.add_argument('--formatos', nargs='+', choices=synthetic.FORMATS, default=['csv', 'csv-latin1'])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede o pico de memória (mais rápido)")
+    parser.add_argument('-o', '--output', type=Path, default=None, help="Arquivo JSON de saída")
+    parser.add_argument('--comparar', type=Path, default=None, help="JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in args.linhas:
+        for fmt in args.formatos:
+            case = benchmark(rows, fmt, args.repeticoes, args.seed, memory=not args.sem_memoria)
+            results.append(case)
+            print(f"{case['rows']:>10,} {fmt:<11} {case['total_seconds']:8.3f}s  " +
+                  '  '.join(f"{name}={s['seconds']:.3f}s" for name, s in case['stages'].items()))
+
+    report = {'environment': environment(), 'results': results}
+    output = args.output or DEFAULT_DIR / f"resultado_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"Resultado gravado em {output}")
+
+    if args.comparar:
+        old = json.loads(args.comparar.read_text(encoding='utf-8'))
+        for rows, fmt, stage, before, after, ratio in compare(report, old):
+            flag = '  <-- regressão' if ratio > 1.2 else ''
+            print(f"{rows:>10,} {fmt:<11} {stage:<24} {before:8.3f}s -> {after:8.3f}s  x{ratio:.2f}{flag}")
+
+
+if __name__ == '__main__':
+    main()
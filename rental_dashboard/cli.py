@@ -0,0 +1,130 @@
+"""
+Processamento em lote (sem Streamlit) de várias carteiras.
+
+Uso:
+    python cli.py PASTA_ENTRADA -o PASTA_SAIDA [--multa 10] [--juros 1] [--workers N]
+
+Para cada planilha (.csv/.xlsx) grava um relatório completo e, ao final,
+um resumo consolidado com os indicadores de todas as carteiras.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import data_loader
+import pipeline
+import schema
+
+logger = logging.getLogger("rental_dashboard.cli")
+
+SUPPORTED_SUFFIXES = {'.csv', '.xlsx'}
+SUMMARY_FILE = 'resumo_consolidado.csv'
+# Colunas de contagem do resumo; as demais numéricas são valores em reais
+COUNT_COLUMNS = ('Parcelas', 'Contratos Atrasados')
+
+
+def find_ledgers(input_dir: Path) -> list:
+    """Planilhas suportadas na pasta (ordem alfabética, sem recursão)."""
+    return sorted(p for p in input_dir.iterdir() if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES)
+
+
+def process_file(path, output_dir, reference_date, late_fee_percent, monthly_interest_rate,
+                 excel_options=None) -> dict:
+    """
+    Processa uma planilha e grava seu relatório. Executado nos processos do pool,
+    por isso recebe e devolve apenas tipos simples. `excel_options` (aba e linha do
+    cabeçalho) só se aplicam aos arquivos XLSX.
+    """
+    path, output_dir = Path(path), Path(output_dir)
+    result = {'Arquivo': path.name}
+    read_options = (excel_options or {}) if path.suffix.lower() == '.xlsx' else {}
+    try:
+        with open(path, 'rb') as fh:
+            df = pipeline.load_ledger(fh, **read_options)
+        report = pipeline.build_report(df, reference_date, late_fee_percent, monthly_interest_rate)
+        report_path = output_dir / f"{path.stem}_relatorio.csv"
+        report_path.write_bytes(pipeline.export_csv(report.ledger))
+        result.update(report.kpis())
+        result['Relatório'] = report_path.name
+    except data_loader.DataLoadError as e:
+        result['Erro'] = str(e)
+    except Exception as e:
+        # Falha inesperada numa planilha não interrompe o lote: vira erro no resumo
+        result['Erro'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run(input_dir, output_dir, reference_date=None, late_fee_percent=10.0,
+        monthly_interest_rate=1.0, workers=None, excel_options=None) -> pd.DataFrame:
+    """Processa todas as planilhas em paralelo e grava o resumo consolidado."""
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    reference_date = pd.Timestamp.now() if reference_date is None else pd.Timestamp(reference_date)
+    files = find_ledgers(input_dir)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(process_file, path, output_dir, reference_date, late_fee_percent, monthly_interest_rate,
+                        excel_options): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # Processo do pool interrompido ou resultado não serializável
+                result = {'Arquivo': futures[future].name, 'Erro': f"{type(e).__name__}: {e}"}
+            logger.info(json.dumps(result, ensure_ascii=False, default=str))
+            results.append(result)
+
+    summary = pd.DataFrame(results)
+    if not summary.empty:
+        summary = summary.sort_values('Arquivo').reset_index(drop=True)
+        totals = summary.select_dtypes('number').sum()
+        for col in totals.index.difference(COUNT_COLUMNS):
+            # Soma em centavos: o total não acumula o erro de arredondamento dos floats
+            totals[col] = schema.to_reais(schema.to_centavos(summary[col]).sum())
+        summary = pd.concat([summary, totals.to_frame().T.assign(Arquivo='TOTAL')], ignore_index=True)
+        counts = [c for c in COUNT_COLUMNS if c in summary.columns]
+        summary[counts] = summary[counts].astype('Int64')
+    summary.to_csv(output_dir / SUMMARY_FILE, index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa em lote uma pasta de carteiras de aluguel (CSV/XLSX).")
+    parser.add_argument('input_dir', type=Path, help="Pasta com as planilhas")
+    parser.add_argument('-o', '--output-dir', type=Path, default=Path('relatorios'), help="Pasta de saída (padrão: relatorios)")
+    parser.add_argument('--multa', type=float, default=10.0, help="Multa por atraso em %% (padrão: 10)")
+    parser.add_argument('--juros', type=float, default=1.0, help="Juros mensais em %% (padrão: 1)")
+    parser.add_argument('--data-base', default=None, help="Data de referência AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument('--workers', type=int, default=None, help="Processos em paralelo (padrão: nº de núcleos)")
+    parser.add_argument('--aba', default=None, help="Aba das planilhas XLSX: nome ou posição, 0 = primeira (padrão: 0)")
+    parser.add_argument('--linha-cabecalho', type=int, default=1, help="Linha do cabeçalho nas planilhas XLSX (padrão: 1)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not args.input_dir.is_dir():
+        parser.error(f"pasta não encontrada: {args.input_dir}")
+    if args.linha_cabecalho < 1:
+        parser.error("--linha-cabecalho deve ser 1 ou maior")
+    sheet = int(args.aba) if args.aba is not None and args.aba.isdigit() else args.aba
+    excel_options = {'sheet_name': 0 if sheet is None else sheet, 'header_row': args.linha_cabecalho - 1}
+
+    summary = run(args.input_dir, args.output_dir, args.data_base, args.multa, args.juros, args.workers,
+                  excel_options)
+    failed = int(summary['Erro'].notna().sum()) if 'Erro' in summary else 0
+    print(f"{len(summary) - 1 if len(summary) else 0} planilha(s) processada(s), {failed} com erro. "
+          f"Resumo: {args.output_dir / SUMMARY_FILE}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from readjustment import to_month_code
+
+NO_PERIOD = -1
+
+
+def period_label(code: int) -> str:
+    """Código inteiro de mês (ano*12 + mês-1) -> 'AAAA-MM'."""
+    year, month = divmod(int(code), 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+class AggregateCube:
+    """
+    Cubo pré-agregado Mês × Status (× Imóvel, opcional) com Valor, Total Devido e contagem.
+    Os meses são códigos inteiros; KPIs e gráficos são lidos do cubo, então o custo de
+    renderização depende do número de meses, não do número de parcelas.
+    Aceita somar (sign=+1) ou retirar (sign=-1) linhas para atualizações incrementais.
+    """
+
+    def __init__(self, by_property: bool = False):
+        self.by_property = by_property
+        self.cells = {}   # (mês, status[, imóvel]) -> [valor, total_devido, n]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, by_property: bool = False):
+        cube = cls(by_property=by_property)
+        cube.add(df)
+        return cube
+
+    def _keys(self, df):
+        keys = [pd.Series(to_month_code(df['Vencimento']), index=df.index, name='Mes'), df['Status']]
+        if self.by_property:
+            imovel = df['Imóvel'] if 'Imóvel' in df.columns else pd.Series('', index=df.index)
+            keys.append(imovel.astype(object).fillna('').astype(str).rename('Imóvel'))
+        return keys
+
+    def add(self, df: pd.DataFrame, sign: int = 1):
+        if df.empty:
+            return
+        devido = df['Total Devido'] if 'Total Devido' in df.columns else df['Valor']
+        # Mantém o tipo do dinheiro: com centavos (int64) as somas são exatas
+        values = pd.DataFrame({'Valor': df['Valor'].to_numpy(),
+                               'Devido': devido.to_numpy(),
+                               'N': np.ones(len(df), dtype=np.int64)}, index=df.index)
+        grouped = values.groupby(self._keys(df), sort=False, observed=True).sum()
+        for key, (valor, total, n) in zip(grouped.index, grouped.itertuples(index=False)):
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = [0, 0, 0]
+            cell[0] += sign * valor
+            cell[1] += sign * total
+            cell[2] += sign * int(n)
+            if cell[2] <= 0:
+                del self.cells[key]
+
+    # --- Consultas ---
+    def status_totals(self) -> dict:
+        totals = {}
+        for key, (valor, _, _) in self.cells.items():
+            totals[key[1]] = totals.get(key[1], 0) + valor
+        return totals
+
+    def status_total(self, status: str):
+        return sum(c[0] for k, c in self.cells.items() if k[1] == status)
+
+    def devido_total(self, status: str):
+        return sum(c[1] for k, c in self.cells.items() if k[1] == status)
+
+    def count(self, status: str) -> int:
+        return int(sum(c[2] for k, c in self.cells.items() if k[1] == status))
+
+    @property
+    def overdue_total(self):
+        return self.devido_total('Atrasado')
+
+    @property
+    def overdue_count(self) -> int:
+        return self.count('Atrasado')
+
+    def status_frame(self) -> pd.DataFrame:
+        """Valor por Status (gráfico de pizza)."""
+        rows = [(s, v) for s, v in self.status_totals().items() if v != 0]
+        return pd.DataFrame(rows, columns=['Status', 'Valor'])
+
+    def timeline_frame(self) -> pd.DataFrame:
+        """Valor por Mes × Status (gráfico de barras), meses em ordem cronológica."""
+        totals = {}
+        for key, (valor, _, _) in self.cells.items():
+            if key[0] != NO_PERIOD:
+                totals[key[:2]] = totals.get(key[:2], 0) + valor
+        rows = [(period_label(m), s, v) for (m, s), v in sorted(totals.items(), key=lambda kv: (kv[0][0], str(kv[0][1])))
+                if v != 0]
+        return pd.DataFrame(rows, columns=['Mes', 'Status', 'Valor'])
+
+    def property_frame(self) -> pd.DataFrame:
+        """Valor, Total Devido e parcelas por Imóvel × Status (requer by_property=True)."""
+        if not self.by_property:
+            raise ValueError("Cubo construído sem a dimensão Imóvel")
+        totals = {}
+        for (_, status, imovel), (valor, total, n) in self.cells.items():
+            cell = totals.setdefault((imovel, status), [0, 0, 0])
+            cell[0] += valor
+            cell[1] += total
+            cell[2] += n
+        rows = [(i, s, v, t, n) for (i, s), (v, t, n) in sorted(totals.items(), key=lambda kv: tuple(map(str, kv[0])))]
+        return pd.DataFrame(rows, columns=['Imóvel', 'Status', 'Valor', 'Total Devido', 'Parcelas'])
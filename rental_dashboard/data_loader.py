@@ -1,133 +1,407 @@
-import streamlit as st
+import codecs
+import csv
+import functools
+import json
+import re
+import unicodedata
+from pathlib import Path
 import pandas as pd
-from bcb import sgs
+import diagnostics
+import parsers
 
-@st.cache_data(ttl=3600)  # Cache de 1 hora para evitar chamadas excessivas
-def get_inflation_index(indicator: str, start_date: str):
+_inflation_store = None
+
+class DataLoadError(Exception):
+    """Arquivo que não pôde ser lido ou interpretado (mensagem pronta para o usuário)."""
+
+def get_inflation_store():
+    """Instância única do armazenamento local das séries do BCB."""
+    global _inflation_store
+    if _inflation_store is None:
+        # Importado no primeiro uso: o painel do BCB é opcional e o módulo traz sqlite3/urllib
+        import inflation_store
+        _inflation_store = inflation_store.InflationStore()
+    return _inflation_store
+
+def get_inflation_index(indicator: str, start_date: str, end_date: str = None):
     """
     Busca o índice de inflação (IPCA ou IGP-M) do Banco Central.
     Codes: IPCA=433, IGP-M=189
+    Os dados ficam persistidos em disco: só os meses ausentes são buscados e,
+    sem conexão, a série é servida a partir do último snapshot local.
+    """
+    return get_inflation_store().get(indicator, start_date, end_date)
+
+CSV_SAMPLE_BYTES = 64 * 1024
+CSV_ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+CSV_SEPARATORS = [';', ',', '\t', '|']
+
+def detect_csv_dialect(sample: bytes):
+    """
+    Detecta encoding e separador a partir de uma amostra limitada do arquivo.
+    Retorna (encoding, separador).
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+        text = sample[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
+    else:
+        encoding, text = None, None
+        for enc in CSV_ENCODINGS:
+            try:
+                # final=False: a amostra pode cortar um caractere multibyte no final
+                text = codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+                encoding = enc
+                break
+            except UnicodeDecodeError:
+                continue
+
+    # Descarta a última linha (possivelmente incompleta) quando a amostra não é o arquivo todo
+    lines = text.splitlines()
+    if len(sample) >= CSV_SAMPLE_BYTES and len(lines) > 1:
+        lines = lines[:-1]
+    lines = [l for l in lines if l.strip()]
+
+    # Separador: o primeiro (na ordem de preferência) com o mesmo nº de colunas (>1) em todas as linhas;
+    # senão, o de maior consistência
+    best_sep, best_score = CSV_SEPARATORS[0], -1.0
+    for sep in CSV_SEPARATORS:
+        counts = [len(row) for row in csv.reader(lines, delimiter=sep)]
+        if not counts:
+            continue
+        mode = max(set(counts), key=counts.count)
+        if mode <= 1:
+            continue
+        score = counts.count(mode) / len(counts)
+        if score == 1.0:
+            return encoding, sep
+        if score > best_score:
+            best_sep, best_score = sep, score
+    return encoding, best_sep
+
+# Bytes inválidos depois da amostra: latin1 decodifica qualquer byte
+CSV_FALLBACK_ENCODING = 'latin1'
+
+def _sniff_csv(uploaded_file):
+    """(encoding, separador) a partir da amostra inicial; deixa o arquivo no início."""
+    uploaded_file.seek(0)
+    encoding, sep = detect_csv_dialect(uploaded_file.read(CSV_SAMPLE_BYTES))
+    uploaded_file.seek(0)
+    return encoding, sep
+
+@functools.lru_cache(maxsize=1)
+def excel_engine() -> str:
+    """
+    Leitor de XLSX: 'calamine' (python-calamine, em Rust, muito mais rápido) quando instalado;
+    senão 'openpyxl', que o pandas abre em modo somente leitura (linhas lidas em fluxo).
     """
-    codes = {'IPCA': 433, 'IGP-M': 189}
     try:
-        if indicator not in codes:
-            return None
-        
-        # Busca a série histórica
-        serie = sgs.get({indicator: codes[indicator]}, start=start_date)
-        return serie
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return 'openpyxl'
+
+def list_sheets(uploaded_file) -> list:
+    """Nomes das abas de um XLSX (lê só o índice da pasta de trabalho)."""
+    try:
+        uploaded_file.seek(0)
+        with pd.ExcelFile(uploaded_file, engine=excel_engine()) as xls:
+            return list(xls.sheet_names)
     except Exception as e:
-        st.error(f"Erro ao buscar dados do BCB: {e}")
-        return None
+        raise DataLoadError(f"Erro ao abrir a planilha Excel: {e}") from e
+    finally:
+        uploaded_file.seek(0)
 
-def load_data(uploaded_file):
+@diagnostics.timed('load_data')
+def load_data(uploaded_file, sheet_name=0, header_row: int = 0):
     """
     Carrega os dados do arquivo Excel ou CSV enviado.
+    Para Excel, `sheet_name` (nome ou posição) escolhe a aba e `header_row` (0 = primeira
+    linha) a linha do cabeçalho; a escolha fica em df.attrs['excel_sheet'].
+    Para CSV, o dialeto detectado fica em df.attrs['csv_dialect'].
+    Levanta DataLoadError se o arquivo não puder ser lido.
     """
     if uploaded_file is None:
         return None
     
     try:
         if uploaded_file.name.endswith('.csv'):
-            # Estratégia Robusta: Tentar combinações de separadores e encodings
-            separators = [';', ',', '\t']
-            encodings = ['utf-8', 'latin1', 'cp1252']
-            
-            for enc in encodings:
-                for sep in separators:
-                    try:
-                        uploaded_file.seek(0)
-                        df = pd.read_csv(uploaded_file, sep=sep, encoding=enc, engine='python')
-                        
-                        # Critério de sucesso: Ter mais de 1 coluna
-                        if len(df.columns) > 1:
-                            return df
-                    except:
-                        continue
-            
-            # Última tentativa: engine python com sep=None (sniffing)
+            # Detecta encoding/separador uma única vez numa amostra e faz uma só leitura completa (engine C)
+            encoding, sep = _sniff_csv(uploaded_file)
             try:
-                uploaded_file.seek(0)
-                return pd.read_csv(uploaded_file, sep=None, engine='python')
-            except:
-                st.error("Não foi possível ler o arquivo CSV. Verifique se ele não está corrompido.")
-                return None
+                try:
+                    df = pd.read_csv(uploaded_file, sep=sep, encoding=encoding, engine='c')
+                except UnicodeDecodeError:
+                    encoding = CSV_FALLBACK_ENCODING
+                    uploaded_file.seek(0)
+                    df = pd.read_csv(uploaded_file, sep=sep, encoding=encoding, engine='c')
+            except Exception:
+                # Última tentativa: engine python com sep=None (sniffing)
+                try:
+                    uploaded_file.seek(0)
+                    df = pd.read_csv(uploaded_file, sep=None, encoding=encoding, engine='python')
+                    sep = None
+                except Exception:
+                    raise DataLoadError("Não foi possível ler o arquivo CSV. Verifique se ele não está corrompido.")
+            df.attrs['csv_dialect'] = {'encoding': encoding, 'sep': sep}
         else:
-            df = pd.read_excel(uploaded_file)
+            engine = excel_engine()
+            uploaded_file.seek(0)
+            df = pd.read_excel(uploaded_file, sheet_name=sheet_name, header=header_row, engine=engine)
+            df.attrs['excel_sheet'] = {'sheet': sheet_name, 'header_row': header_row, 'engine': engine}
         
         # Padronização básica de colunas (caso necessário)
         # df.columns = [c.lower().replace(' ', '_') for c in df.columns]
         
         return df
+    except DataLoadError:
+        raise
     except Exception as e:
-        st.error(f"Erro ao carregar arquivo: {e}")
-        return None
+        raise DataLoadError(f"Erro ao carregar arquivo: {e}") from e
+
+def _iter_excel_chunks(uploaded_file, chunksize: int, sheet_name=0, header_row: int = 0):
+    """Blocos de um XLSX lidos linha a linha (openpyxl somente leitura), sem carregar a aba inteira."""
+    import openpyxl
+    uploaded_file.seek(0)
+    wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        for _ in range(header_row):
+            next(rows, None)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f'Unnamed: {i}' for i, c in enumerate(header)]
+        batch = []
+        for row in rows:
+            if any(v is not None for v in row):
+                batch.append(row[:len(columns)])
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        wb.close()
+
+def _iter_csv_chunks(uploaded_file, chunksize: int):
+    """
+    Blocos de um CSV (engine C). Se aparecer um byte inválido depois da amostra, a leitura
+    recomeça em latin1 a partir da primeira linha ainda não entregue (como em load_data).
+    """
+    encoding, sep = _sniff_csv(uploaded_file)
+    delivered = 0
+    while True:
+        # Linha 0 é o cabeçalho; as `delivered` linhas seguintes já foram entregues
+        skip = range(1, delivered + 1) if delivered else None
+        try:
+            with pd.read_csv(uploaded_file, sep=sep, encoding=encoding, engine='c', chunksize=chunksize,
+                             skiprows=skip) as reader:
+                for chunk in reader:
+                    chunk.attrs['csv_dialect'] = {'encoding': encoding, 'sep': sep}
+                    delivered += len(chunk)
+                    yield chunk
+            return
+        except UnicodeDecodeError:
+            if encoding == CSV_FALLBACK_ENCODING:
+                raise
+            encoding = CSV_FALLBACK_ENCODING
+            uploaded_file.seek(0)
+
+def iter_data_chunks(uploaded_file, chunksize: int = 100_000, sheet_name=0, header_row: int = 0):
+    """
+    Lê o arquivo em blocos de `chunksize` linhas (modo streaming).
+    CSV é lido de forma incremental pelo pandas; Excel é percorrido linha a linha
+    (openpyxl somente leitura), na aba e linha de cabeçalho escolhidas.
+    Levanta DataLoadError se o arquivo não puder ser lido.
+    """
+    if uploaded_file is None:
+        return
+    try:
+        if uploaded_file.name.endswith('.csv'):
+            yield from _iter_csv_chunks(uploaded_file, chunksize)
+        else:
+            yield from _iter_excel_chunks(uploaded_file, chunksize, sheet_name, header_row)
+    except DataLoadError:
+        raise
+    except Exception as e:
+        raise DataLoadError(f"Erro ao carregar arquivo: {e}") from e
+
+@diagnostics.timed('coerce_types')
+def coerce_types(df):
+    """
+    Padroniza os tipos das colunas principais (Vencimento, Valor, Status).
+    Levanta exceção se os dados não puderem ser convertidos.
+    """
+    df['Vencimento'] = parsers.parse_dates(df['Vencimento'])
+    df['Valor'] = parsers.parse_money(df['Valor']).fillna(0.0)
+    if 'Status' not in df.columns:
+        df['Status'] = 'Pendente'
+    return df
+
+# Dicionário de sinônimos para colunas padrão (Expandido).
+# A ordem das palavras-chave importa: as primeiras são as mais fortes.
+COLUMN_SYNONYMS = {
+    'Valor': [
+        'valor', 'total', 'aluguel', 'preço', 'quantia', 'montante', 'devido', 'debito', 
+        'arrecadado', 'pagar', 'cobrado', 'mensalidade', 'boleto', 'price', 'amount', 'value', 'cost'
+    ],
+    'Vencimento': [
+        'vencimento', 'data', 'venc', 'dt_venc', 'dia', 'periodo', 'competencia', 
+        'prazo', 'limite', 'date', 'due_date', 'deadline', 'when'
+    ],
+    'Inquilino': [
+        'inquilino', 'cliente', 'locatario', 'nome', 'morador', 'pessoa', 'pagador', 
+        'responsavel', 'condomino', 'usuario', 'sacado', 'tenant', 'name', 'client', 'payer'
+    ],
+    'Status': [
+        'status', 'estado', 'situacao', 'pagamento', 'condicao', 'posicao', 
+        'situ', 'estagio', 'state', 'condition', 'situation'
+    ],
+    'Pago_em': [
+        'pago', 'data_pagamento', 'quitado', 'recebido', 'baixa', 'confirmacao', 
+        'compensacao', 'paid', 'payment_date', 'receipt'
+    ],
+    'Imóvel': [
+        'imovel', 'unidade', 'apartamento', 'sala', 'casa', 'loja', 'apto', 
+        'bloco', 'edificio', 'condominio', 'property', 'unit', 'location'
+    ],
+    # Reajuste anual: data-base do contrato e índice (usados em readjustment.readjust_portfolio).
+    # Só termos de data: 'data' sozinha continua indo para Vencimento e colunas como
+    # 'Reajuste %' ou 'Valor Reajuste' (números) não podem virar a coluna de datas
+    'Aniversario': [
+        'aniversario', 'data_de_reajuste', 'data_do_reajuste', 'data_reajuste', 'mes_de_reajuste',
+        'mes_do_reajuste', 'mes_reajuste', 'inicio_do_contrato', 'inicio_contrato', 'data_inicio',
+        'anniversary', 'renewal_date'
+    ],
+    'Indice': [
+        'indice', 'indexador', 'index'
+    ]
+}
+
+LAYOUT_PROFILES_PATH = Path(__file__).parent / '.data' / 'layouts.json'
+
+# Níveis de casamento entre cabeçalho e palavra-chave
+_MATCH_EXACT, _MATCH_TOKEN, _MATCH_SUBSTRING = 3, 2, 1
+
+def _normalize_header(name) -> str:
+    """Minúsculas, sem acentos e com separadores unificados em '_'."""
+    text = unicodedata.normalize('NFKD', str(name).strip().lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_')
+
+def _compile_synonyms(synonyms):
+    """Pré-compila a tabela de sinônimos: índice palavra-chave -> (alvo, prioridade) e um único regex."""
+    index = {}
+    for target_pos, (target, keywords) in enumerate(synonyms.items()):
+        for rank, key in enumerate(keywords):
+            index.setdefault(_normalize_header(key), (target, rank, target_pos))
+    # Lookahead captura ocorrências sobrepostas; palavras mais longas primeiro
+    alternation = '|'.join(re.escape(k) for k in sorted(index, key=len, reverse=True))
+    return index, re.compile(f'(?=({alternation}))')
+
+_KEYWORD_INDEX, _KEYWORD_PATTERN = _compile_synonyms(COLUMN_SYNONYMS)
+_TARGET_ORDER = {target: pos for pos, target in enumerate(COLUMN_SYNONYMS)}
+
+def _score_header(norm: str) -> dict:
+    """Pontua um cabeçalho contra todos os alvos: {alvo: (nível, -prioridade, nº de acertos)}."""
+    padded = f'_{norm}_'
+    best = {}
+    for m in _KEYWORD_PATTERN.finditer(norm):
+        key = m.group(1)
+        target, rank, _ = _KEYWORD_INDEX[key]
+        if key == norm:
+            level = _MATCH_EXACT
+        elif f'_{key}_' in padded:
+            level = _MATCH_TOKEN
+        else:
+            level = _MATCH_SUBSTRING
+        prev = best.get(target)
+        if prev is None:
+            best[target] = (level, -rank, 1)
+        else:
+            best[target] = max((level, -rank), prev[:2]) + (prev[2] + 1,)
+    return best
+
+@functools.lru_cache(maxsize=256)
+def resolve_column_mapping(headers: tuple) -> tuple:
+    """
+    Resolve o mapeamento cabeçalho -> coluna padrão para uma tupla de cabeçalhos.
+    Atribuição global e determinística (independe da ordem das colunas): vence o maior
+    nível de casamento (exato > palavra inteira > trecho), depois a palavra-chave mais forte
+    e o maior número de palavras-chave encontradas. Resultado em cache por layout.
+    """
+    normalized = tuple(_normalize_header(h) for h in headers)
+    profile = load_layout_profiles().get(normalized)
+    if profile is not None:
+        return tuple((h, profile[n]) for h, n in zip(headers, normalized) if n in profile)
+
+    # Se a coluna já existe exatamente, não é remapeada
+    taken_targets = {h for h in headers if h in COLUMN_SYNONYMS}
+    candidates = []
+    for header in headers:
+        if header in taken_targets:
+            continue
+        norm = _normalize_header(header)
+        for target, (level, neg_rank, hits) in _score_header(norm).items():
+            if target not in taken_targets:
+                candidates.append(((-level, -neg_rank, -hits, _TARGET_ORDER[target], norm, header), header, target))
+
+    mapping, used_headers = [], set()
+    for _, header, target in sorted(candidates):
+        if header in used_headers or target in taken_targets:
+            continue
+        mapping.append((header, target))
+        used_headers.add(header)
+        taken_targets.add(target)
+    return tuple(mapping)
+
+@functools.lru_cache(maxsize=1)
+def load_layout_profiles() -> dict:
+    """Perfis de layout salvos: {tupla de cabeçalhos normalizados: {cabeçalho normalizado: coluna padrão}}."""
+    if not LAYOUT_PROFILES_PATH.exists():
+        return {}
+    try:
+        data = json.loads(LAYOUT_PROFILES_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return {tuple(p['headers']): p['mapping'] for p in data.values()}
+
+def save_layout_profile(name: str, headers, mapping: dict):
+    """Salva (ou substitui) um perfil de layout nomeado para reutilizar o mapeamento."""
+    headers = [str(h).strip() for h in headers]
+    data = {}
+    if LAYOUT_PROFILES_PATH.exists():
+        try:
+            data = json.loads(LAYOUT_PROFILES_PATH.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+    data[name] = {
+        'headers': [_normalize_header(h) for h in headers],
+        'mapping': {_normalize_header(h): target for h, target in mapping.items()},
+    }
+    LAYOUT_PROFILES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    LAYOUT_PROFILES_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    load_layout_profiles.cache_clear()
+    resolve_column_mapping.cache_clear()
 
+@diagnostics.timed('smart_normalize_columns')
 def smart_normalize_columns(df):
     """
     Tenta identificar automaticamente as colunas necessárias usando palavras-chave.
+    O mapeamento aplicado fica em df.attrs['column_mapping'].
     """
     if df is None:
         return None
         
-    df.columns = df.columns.str.strip() # Remove espaços extras
-    
-    # Dicionário de sinônimos para colunas padrão (Expandido)
-    synonyms = {
-        'Valor': [
-            'valor', 'total', 'aluguel', 'preço', 'quantia', 'montante', 'devido', 'debito', 
-            'arrecadado', 'pagar', 'cobrado', 'mensalidade', 'boleto', 'price', 'amount', 'value', 'cost'
-        ],
-        'Vencimento': [
-            'vencimento', 'data', 'venc', 'dt_venc', 'dia', 'periodo', 'competencia', 
-            'prazo', 'limite', 'date', 'due_date', 'deadline', 'when'
-        ],
-        'Inquilino': [
-            'inquilino', 'cliente', 'locatario', 'nome', 'morador', 'pessoa', 'pagador', 
-            'responsavel', 'condomino', 'usuario', 'sacado', 'tenant', 'name', 'client', 'payer'
-        ],
-        'Status': [
-            'status', 'estado', 'situacao', 'pagamento', 'condicao', 'posicao', 
-            'situ', 'estagio', 'state', 'condition', 'situation'
-        ],
-        'Pago_em': [
-            'pago', 'data_pagamento', 'quitado', 'recebido', 'baixa', 'confirmacao', 
-            'compensacao', 'paid', 'payment_date', 'receipt'
-        ],
-        'Imóvel': [
-            'imovel', 'unidade', 'apartamento', 'sala', 'casa', 'loja', 'apto', 
-            'bloco', 'edificio', 'condominio', 'property', 'unit', 'location'
-        ]
-    }
-    
-    # Mapeamento final
-    rename_map = {}
-    
-    # Colunas que já existem no DF (lowercase para comparação)
-    df_cols_lower = {c.lower(): c for c in df.columns}
-    
-    for target, keywords in synonyms.items():
-        # Se a coluna já existe exatamente, pula
-        if target in df.columns:
-            continue
-            
-        # Busca por palavras-chave
-        match = None
-        for col_lower, original_col in df_cols_lower.items():
-            # Verifica se alguma palavra-chave está contida no nome da coluna
-            if any(key in col_lower for key in keywords):
-                # Prioridade: 'total devido' ganha de 'multa total' se 'devido' for forte?
-                # Simplificação: Pega a primeira que der match com keywords fortes
-                match = original_col
-                break
-        
-        if match:
-            rename_map[match] = target
-            # Remove do pool para não mapear a mesma coluna duas vezes
-            if str(match).lower() in df_cols_lower:
-                del df_cols_lower[str(match).lower()]
+    df.columns = [str(c).strip() for c in df.columns] # Remove espaços extras
+    source_columns = list(df.columns)
 
+    # Mapeamento final (em cache por layout de cabeçalhos)
+    rename_map = dict(resolve_column_mapping(tuple(source_columns)))
     if rename_map:
         df = df.rename(columns=rename_map)
+    df.attrs['source_columns'] = source_columns
+    df.attrs['column_mapping'] = rename_map
         
     return df
@@ -0,0 +1,165 @@
+"""
+Instrumentação leve das etapas do pipeline e do dashboard.
+
+Cada etapa registra tempo de parede, nº de linhas e variação de memória (RSS do processo)
+e gera uma linha de log estruturada (JSON) no logger deste módulo. Dentro de
+`recording()` os registros também são guardados para exibição no painel "Diagnóstico".
+"""
+import cProfile
+import contextlib
+import contextvars
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOP = 60
+
+_current_run = contextvars.ContextVar('diagnostics_run', default=None)
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def current_rss() -> Optional[int]:
+    """Memória residente do processo em bytes (Linux); None se indisponível."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def configure_logging(level: int = logging.INFO, stream=None):
+    """
+    Emite as linhas JSON das etapas (stderr por padrão) mesmo quando o logger raiz fica em
+    WARNING, como no Streamlit. Idempotente: o script do app roda de novo a cada rerun.
+    """
+    logger.setLevel(level)
+    if not any(getattr(h, '_diagnostics', False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._diagnostics = True
+        logger.addHandler(handler)
+        # Sem propagar: evita linhas duplicadas se a raiz também tiver handler
+        logger.propagate = False
+
+
+class StageRecord(NamedTuple):
+    stage: str
+    seconds: float
+    rows: Optional[int]
+    memory_delta: Optional[int]   # bytes (RSS depois - antes)
+
+
+class RunRecorder:
+    """Registros das etapas de uma execução (um rerun do app ou um processamento)."""
+
+    def __init__(self):
+        self.records = []
+        self.started = time.perf_counter()
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.records, columns=StageRecord._fields)
+        df['rows'] = df['rows'].astype('Int64')
+        df['memory_delta'] = df['memory_delta'] / 2**20
+        return df.rename(columns={'stage': 'Etapa', 'seconds': 'Tempo (s)', 'rows': 'Linhas',
+                                  'memory_delta': 'Memória Δ (MB)'})
+
+
+class _Stage:
+    """Handle devolvido por stage(): permite informar o nº de linhas ao final da etapa."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+
+@contextlib.contextmanager
+def recording():
+    """Coleta os registros das etapas executadas dentro do bloco."""
+    run = RunRecorder()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+def add_records(records):
+    """Anexa à execução atual registros coletados em outro processo (pool de leitura)."""
+    run = _current_run.get()
+    if run is not None:
+        run.records.extend(records)
+
+
+@contextlib.contextmanager
+def stage(name: str, rows: int = None):
+    """Mede uma etapa: `with stage('export_csv', rows=len(df)):` ou ajustando `.rows` no bloco."""
+    handle = _Stage(rows)
+    rss_before = current_rss()
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        seconds = time.perf_counter() - start
+        rss_after = current_rss()
+        delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        record = StageRecord(name, seconds, handle.rows, delta)
+        run = _current_run.get()
+        if run is not None:
+            run.records.append(record)
+        logger.info(json.dumps({'event': 'stage', **record._asdict()}, ensure_ascii=False))
+
+
+def timed(name: str):
+    """Decorador: mede a função como uma etapa; o nº de linhas vem do DataFrame retornado."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as handle:
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    handle.rows = len(result)
+            return result
+        return wrapper
+    return decorator
+
+
+class ProfileCapture:
+    """Resultado de profiling(): relatório pstats em texto (vazio se desativado)."""
+
+    def __init__(self):
+        self.report = ''
+
+
+@contextlib.contextmanager
+def profiling(enabled: bool = True, top: int = PROFILE_TOP):
+    """cProfile opcional do bloco; o relatório (ordenado por tempo acumulado) fica em `.report`."""
+    capture = ProfileCapture()
+    if not enabled:
+        yield capture
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+        capture.report = out.getvalue()
@@ -0,0 +1,93 @@
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pandas as pd
+
+import diagnostics
+import schema
+
+logger = logging.getLogger(__name__)
+
+
+class ExportFormat(NamedTuple):
+    extension: str
+    mime: str
+
+
+EXPORT_FORMATS = {
+    'CSV': ExportFormat('.csv', 'text/csv'),
+    'Parquet': ExportFormat('.parquet', 'application/vnd.apache.parquet'),
+    'XLSX': ExportFormat('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Hash do conteúdo (colunas, tipos e valores): muda sempre que uma edição altera os dados."""
+    h = hashlib.sha256()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _to_parquet(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    try:
+        df.to_parquet(buffer, index=False)
+    except Exception as e:
+        # Colunas object com tipos mistos (ex.: linhas digitadas no editor) viram texto
+        logger.warning("Exportação Parquet com colunas convertidas para texto: %s", e)
+        buffer = io.BytesIO()
+        mixed = {c: 'string' for c in df.columns if df[c].dtype == object}
+        df.astype(mixed).to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _to_xlsx(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, sheet_name='Relatório')
+    return buffer.getvalue()
+
+
+def serialize(df: pd.DataFrame, fmt: str) -> bytes:
+    """Serializa o relatório (dinheiro em reais) no formato pedido: 'CSV', 'Parquet' ou 'XLSX'."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt} (use {', '.join(EXPORT_FORMATS)})")
+    view = schema.display_frame(df) if schema.is_compact(df) else df
+    view = view.drop(columns=schema.ID_COLUMN, errors='ignore')
+    with diagnostics.stage(f'export_{fmt.lower()}', rows=len(view)):
+        if fmt == 'CSV':
+            return view.to_csv(index=False).encode('utf-8')
+        if fmt == 'Parquet':
+            return _to_parquet(view)
+        return _to_xlsx(view)
+
+
+class ExportCache:
+    """
+    Cache LRU dos arquivos exportados, indexado por (hash dos dados, formato).
+    Os arquivos só são gerados quando pedidos; uma edição muda o hash e força nova geração.
+    Seguro entre threads (o download roda fora do rerun do script).
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, df: pd.DataFrame, fmt: str) -> bytes:
+        key = (frame_digest(df), fmt)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        data = serialize(df, fmt)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
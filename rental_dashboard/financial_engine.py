@@ -1,5 +1,19 @@
+import functools
 import numpy as np
 import pandas as pd
+from typing import NamedTuple
+
+@functools.lru_cache(maxsize=1)
+def _numpy_financial():
+    """
+    numpy.pmt & cia. foram removidos do NumPy (v1.20+); usa numpy_financial se instalado,
+    senão as fórmulas fechadas abaixo. Importado só no primeiro uso (e resolvido uma única vez).
+    """
+    try:
+        import numpy_financial
+    except ImportError:
+        return None
+    return numpy_financial
 
 def calculate_late_fee(value: float, late_fee_percent: float = 10.0) -> float:
     """Calcula a multa fixa sobre o valor original."""
@@ -15,25 +29,176 @@ def calculate_interest(value: float, days_delayed: int, monthly_interest_rate: f
     daily_rate = monthly_interest_rate / 30.0
     return value * (daily_rate / 100.0) * days_delayed
 
-def financial_calculator(rate, nper, pv, target='pmt'):
+class ArrearsResult(NamedTuple):
+    """Resultado do cálculo de inadimplência em lote (arrays alinhados às entradas)."""
+    days_late: np.ndarray
+    late_fee: np.ndarray
+    interest: np.ndarray
+    total: np.ndarray
+
+def calculate_arrears_batch(values, due_dates, statuses=None, reference_date=None,
+                            late_fee_percent: float = 10.0, monthly_interest_rate: float = 1.0) -> ArrearsResult:
+    """
+    Versão vetorizada de calculate_late_fee + calculate_interest para colunas inteiras.
+    Reproduz exatamente a regra por linha do app: parcelas com Status 'Pago' ou
+    vencimento inválido (NaT) não têm atraso; as demais acumulam dias desde o vencimento.
+    Valores inteiros são tratados como centavos: multa e juros são arredondados ao
+    centavo e todos os resultados voltam em int64 (totais exatos).
+    """
+    values = np.asarray(values)
+    in_centavos = np.issubdtype(values.dtype, np.integer)
+    if not in_centavos:
+        values = values.astype(float)
+    if reference_date is None:
+        reference_date = pd.Timestamp.now()
+
+    # Dias corridos (floor, igual a Timedelta.days); NaT vira NaN
+    delta = pd.Timestamp(reference_date) - pd.DatetimeIndex(due_dates)
+    raw_days = np.asarray(delta.days, dtype=float)
+
+    not_due = np.isnan(raw_days)
+    if statuses is not None:
+        # Comparação direta na Series (rápida para categóricos); nulos não são 'Pago'
+        not_due |= pd.Series(statuses, copy=False).eq('Pago').to_numpy(dtype=bool, na_value=False)
+
+    days_late = np.where(not_due, 0, np.maximum(raw_days, 0)).astype(np.int64)
+    is_late = days_late > 0
+
+    # Mesma ordem de operações das funções escalares (resultado bit a bit idêntico)
+    late_fee = np.where(is_late, values * (late_fee_percent / 100.0), 0.0)
+    daily_rate = monthly_interest_rate / 30.0
+    interest = np.where(is_late, values * (daily_rate / 100.0) * days_late, 0.0)
+    if in_centavos:
+        late_fee = np.rint(late_fee).astype(np.int64)
+        interest = np.rint(interest).astype(np.int64)
+    total = values + late_fee + interest
+
+    return ArrearsResult(days_late, late_fee, interest, total)
+
+def _rate_power(rate, nper):
+    """(1 + r)^n com broadcasting."""
+    return (1.0 + np.asarray(rate, dtype=float)) ** np.asarray(nper, dtype=float)
+
+def pmt(rate, nper, pv, fv=0.0):
+    """
+    Prestação constante (sistema Price), convenção de sinais do numpy_financial
+    (pv positivo -> prestação negativa). Aceita arrays e faz broadcasting.
+    """
+    npf = _numpy_financial()
+    if npf is not None:
+        return npf.pmt(rate, nper, pv, fv)
+    rate, nper, pv, fv = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (rate, nper, pv, fv)))
+    factor = _rate_power(rate, nper)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = -(pv * factor + fv) * rate / (factor - 1.0)
+    result = np.where(rate == 0, -(pv + fv) / nper, result)
+    return result[()] if result.ndim == 0 else result
+
+def _balance(rate, per, nper, pv):
+    """Saldo devedor após `per` prestações Price (valor positivo para pv positivo)."""
+    payment = pmt(rate, nper, pv)
+    factor = _rate_power(rate, per)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = pv * factor + payment * (factor - 1.0) / rate
+    return np.where(np.asarray(rate) == 0, pv + payment * np.asarray(per, dtype=float), balance)
+
+def ipmt(rate, per, nper, pv):
+    """Parcela de juros da prestação `per` (1..nper), convenção do numpy_financial."""
+    npf = _numpy_financial()
+    if npf is not None:
+        return npf.ipmt(rate, per, nper, pv)
+    result = -_balance(rate, np.asarray(per, dtype=float) - 1.0, nper, pv) * np.asarray(rate, dtype=float)
+    return result[()] if np.ndim(result) == 0 else result
+
+def ppmt(rate, per, nper, pv):
+    """Parcela de amortização da prestação `per` (1..nper), convenção do numpy_financial."""
+    npf = _numpy_financial()
+    if npf is not None:
+        return npf.ppmt(rate, per, nper, pv)
+    return pmt(rate, nper, pv) - ipmt(rate, per, nper, pv)
+
+def npv(rate, values):
+    """
+    Valor presente líquido de um fluxo (values[0] na data zero).
+    `rate` pode ser um array: retorna um VPL por taxa.
+    """
+    values = np.asarray(values, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    periods = np.arange(values.shape[-1])
+    discount = (1.0 + rate[..., np.newaxis]) ** periods
+    result = (values / discount).sum(axis=-1)
+    return result[()] if result.ndim == 0 else result
+
+def irr(values):
+    """
+    Taxa interna de retorno por período. Aceita um fluxo (1D) ou vários (2D, um por linha).
+    Retorna NaN quando não há solução real.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim > 1:
+        return np.array([irr(row) for row in values])
+    npf = _numpy_financial()
+    if npf is not None:
+        return npf.irr(values)
+    # Raízes do polinômio em x = 1/(1+r); mesma escolha do numpy_financial (taxa mais próxima de zero)
+    roots = np.roots(values[::-1])
+    roots = roots[np.isreal(roots)].real
+    roots = roots[roots > 0]
+    if roots.size == 0:
+        return np.nan
+    rates = 1.0 / roots - 1.0
+    return rates[np.argmin(np.abs(rates))]
+
+def amortization_schedule(rate: float, nper: int, pv: float, system: str = 'price') -> pd.DataFrame:
+    """
+    Tabela de amortização completa (valores positivos), calculada sem laço por parcela.
+    system: 'price' (prestação constante) ou 'sac' (amortização constante).
+    """
+    nper = int(nper)
+    periods = np.arange(1, nper + 1)
+    if system == 'price':
+        payment = np.full(nper, -float(pmt(rate, nper, pv)))
+        balance = _balance(rate, periods, nper, pv)
+        previous = np.concatenate(([float(pv)], balance[:-1]))
+        interest = previous * rate
+        amortization = payment - interest
+    elif system == 'sac':
+        amortization = np.full(nper, pv / nper)
+        balance = pv - amortization * periods
+        previous = balance + amortization
+        interest = previous * rate
+        payment = amortization + interest
+    else:
+        raise ValueError(f"Sistema de amortização desconhecido: {system}")
+    return pd.DataFrame({
+        'Parcela': periods,
+        'Prestação': payment,
+        'Juros': interest,
+        'Amortização': amortization,
+        'Saldo Devedor': np.abs(np.round(balance, 10)),
+    })
+
+def scenario_grid(rates, terms, pv) -> pd.DataFrame:
+    """
+    Sensibilidade da prestação (valor positivo): uma linha por taxa, uma coluna por prazo.
+    Calculada numa única chamada com broadcasting.
+    """
+    rates = np.asarray(rates, dtype=float)
+    terms = np.asarray(terms, dtype=float)
+    grid = -pmt(rates[:, np.newaxis], terms[np.newaxis, :], pv)
+    return pd.DataFrame(grid, index=pd.Index(rates, name='Taxa'), columns=pd.Index(terms.astype(int), name='Meses'))
+
+FINANCIAL_TARGETS = {'pmt', 'ipmt', 'ppmt'}
+
+def financial_calculator(rate, nper, pv, target='pmt', per=1):
     """
     Calculadora científica financeira usando NumPy.
-    Funciona como simulador (PMT, IPMT, etc).
+    Funciona como simulador (PMT, IPMT, PPMT) e aceita arrays (broadcasting).
     """
-    # Exemplo simples de wrapper. 
-    # numpy.pmt foi depreciado em versões recentes do numpy (v1.20+), recomenda-se numpy_financial.
-    # Como numpy padrão pode ter removido, vamos implementar uma versão simplificada ou usar a fórmula direta se numpy_financial não estiver disponível.
-    
-    # Fórmula PMT: P = (Pv*r) / (1 - (1+r)^-n)
-    try:
-        # Tenta usar numpy_financial se instalado, senão fórmula
-        import numpy_financial as npf
-        if target == 'pmt':
-            return npf.pmt(rate, nper, pv)
-    except ImportError:
-        # Implementação básica de PMT
-        if rate == 0:
-            return -pv / nper
-        return -(pv * rate) / (1 - (1 + rate) ** -nper)
-    
-    return 0.0
+    if target == 'pmt':
+        return pmt(rate, nper, pv)
+    if target == 'ipmt':
+        return ipmt(rate, per, nper, pv)
+    if target == 'ppmt':
+        return ppmt(rate, per, nper, pv)
+    raise ValueError(f"Cálculo desconhecido: {target} (use um de {sorted(FINANCIAL_TARGETS)})")
@@ -0,0 +1,75 @@
+"""
+Verificação do custo de importação dos módulos usados em lote.
+
+Uso:
+    python import_budget.py [--limite-ms 75] [--repeticoes 5]
+
+Importa pandas/numpy primeiro (custo fixo, inevitável) e mede com `python -X importtime`
+o tempo acumulado de data_loader e financial_engine num processo novo. Falha (código 1)
+se o melhor tempo passar do limite ou se alguma dependência pesada for carregada na
+importação — plotly, bcb, openpyxl e companhia devem ser importados só no primeiro uso.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BUDGET_MODULES = ['data_loader', 'financial_engine']
+BASELINE_MODULES = ['pandas', 'numpy']
+DEFAULT_LIMIT_MS = 75.0
+# Não podem ser carregados só por importar os módulos acima
+LAZY_MODULES = ['streamlit', 'plotly', 'bcb', 'openpyxl', 'numpy_financial', 'sqlite3', 'urllib.request']
+
+_PROBE = """
+import sys
+{baseline}
+before = set(sys.modules)
+{modules}
+print(','.join(sorted(m for m in {lazy!r} if m in sys.modules and m not in before)))
+"""
+
+
+def measure() -> tuple:
+    """Um processo novo: (ms acumulados por módulo medido, dependências pesadas carregadas)."""
+    code = _PROBE.format(baseline='\n'.join(f'import {m}' for m in BASELINE_MODULES),
+                         modules='\n'.join(f'import {m}' for m in BUDGET_MODULES),
+                         lazy=LAZY_MODULES)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                          cwd=Path(__file__).resolve().parent, check=True)
+    timings = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip() in BUDGET_MODULES and cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative) / 1000.0
+    loaded = [m for m in proc.stdout.strip().split(',') if m]
+    return timings, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confere o custo de importação de data_loader e financial_engine.")
+    parser.add_argument('--limite-ms', type=float, default=DEFAULT_LIMIT_MS)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.repeticoes)]
+    best = min(sum(t.values()) for t, _ in runs)
+    timings, loaded = min(runs, key=lambda r: sum(r[0].values()))
+    for name in BUDGET_MODULES:
+        print(f"{name:<18} {timings.get(name, 0.0):8.1f} ms")
+    print(f"{'total':<18} {best:8.1f} ms (limite {args.limite_ms:.0f} ms)")
+
+    failed = False
+    if best > args.limite_ms:
+        print("ERRO: importação acima do limite", file=sys.stderr)
+        failed = True
+    if loaded:
+        print(f"ERRO: dependências pesadas carregadas na importação: {', '.join(loaded)}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import schema
+from cube import AggregateCube
+from pipeline import DERIVED_COLUMNS, add_derived_columns
+
+
+class LedgerChanges(NamedTuple):
+    """O que mudou num apply_delta (esquema compacto), para gravação numa base externa."""
+    updated: pd.DataFrame          # linhas editadas (ou restauradas) com os valores atuais
+    deleted: pd.DataFrame          # linhas excluídas, com os valores originais
+    added: pd.DataFrame            # linhas adicionadas no editor (estado atual)
+    previous_added: pd.DataFrame   # linhas adicionadas que deixaram de valer (vazio se nada mudou)
+
+    @property
+    def empty(self) -> bool:
+        return all(frame.empty for frame in self)
+
+
+class IncrementalLedger:
+    """
+    Carteira com colunas derivadas e agregados calculados uma única vez.
+    A cada rerun, apply_delta recebe o estado do st.data_editor (edited_rows,
+    added_rows, deleted_rows) e reprocessa apenas as linhas que mudaram desde
+    o último rerun, ajustando os totais pela diferença.
+    """
+
+    def __init__(self, source_df: pd.DataFrame, reference_date=None,
+                 late_fee_percent: float = 10.0, monthly_interest_rate: float = 1.0):
+        self.reference_date = pd.Timestamp.now() if reference_date is None else pd.Timestamp(reference_date)
+        self.late_fee_percent = late_fee_percent
+        self.monthly_interest_rate = monthly_interest_rate
+
+        # base: esquema compacto (centavos/categóricos); view: cópia em reais para o editor.
+        # Cópia rasa: as colunas de origem são compartilhadas com source_df, não duplicadas
+        self.base = self._derive(schema.compact(source_df.copy(deep=False)))
+        self.view = schema.display_frame(self.base)
+        self.aggregates = AggregateCube.from_frame(self.base)
+        self._base_overdue = np.flatnonzero((self.base['Status'] == 'Atrasado').to_numpy())
+
+        self._effective = {}   # posição -> linha efetiva após edição (None = excluída)
+        self._added = self.base.iloc[0:0]
+        self._applied_edits = {}
+        self._applied_deleted = set()
+        self._applied_added = []
+
+    def _derive(self, df):
+        return add_derived_columns(df, self.reference_date, self.late_fee_percent, self.monthly_interest_rate)
+
+    @staticmethod
+    def _coerce_value(col, value):
+        """Converte um valor editado para o tipo da coluna (datas chegam como texto ISO)."""
+        if col == 'Vencimento':
+            return pd.to_datetime(value, errors='coerce')
+        if col == 'Valor':
+            # O editor trabalha em reais; a base guarda centavos
+            return int(schema.to_centavos([pd.to_numeric(value, errors='coerce')])[0])
+        return value
+
+    def _coerce(self, df):
+        """Tipos das linhas adicionadas pelo editor."""
+        df['Vencimento'] = pd.to_datetime(df['Vencimento'], errors='coerce')
+        df['Valor'] = schema.to_centavos(pd.to_numeric(df['Valor'], errors='coerce'))
+        return df
+
+    def _current_rows(self, positions):
+        rows = []
+        for pos in positions:
+            row = self._effective[pos] if pos in self._effective else self.base.iloc[pos].to_dict()
+            if row is not None:
+                rows.append(row)
+        return pd.DataFrame(rows, columns=self.base.columns)
+
+    def apply_delta(self, delta: dict) -> LedgerChanges:
+        """
+        Aplica o delta acumulado do editor; custo proporcional às linhas alteradas.
+        Retorna as linhas que mudaram desde a chamada anterior.
+        """
+        delta = delta or {}
+        edits = {int(k): v for k, v in delta.get('edited_rows', {}).items()}
+        deleted = set(delta.get('deleted_rows', []))
+        added = list(delta.get('added_rows', []))
+
+        touched = {p for p in edits.keys() | self._applied_edits.keys()
+                   if edits.get(p) != self._applied_edits.get(p)}
+        touched |= deleted ^ self._applied_deleted
+        touched = sorted(p for p in touched if 0 <= p < len(self.base))
+        empty = self.base.iloc[0:0]
+        changes = LedgerChanges(empty, empty, empty, empty)
+
+        if touched:
+            self.aggregates.add(self._current_rows(touched), sign=-1)
+            alive = [p for p in touched if p not in deleted]
+            # Categóricos viram object para aceitar valores novos digitados no editor
+            new_rows = self.base.iloc[alive].copy()
+            new_rows = new_rows.astype({c: object for c in new_rows.columns
+                                        if isinstance(new_rows[c].dtype, pd.CategoricalDtype)})
+            for i, pos in enumerate(alive):
+                for col, value in edits.get(pos, {}).items():
+                    if col in new_rows.columns:
+                        new_rows.iloc[i, new_rows.columns.get_loc(col)] = self._coerce_value(col, value)
+            new_rows = self._derive(new_rows)
+            self.aggregates.add(new_rows)
+            for pos in touched:
+                self._effective[pos] = None
+            for pos, (_, row) in zip(alive, new_rows.iterrows()):
+                self._effective[pos] = row.to_dict()
+            for pos in touched:
+                if pos not in deleted and pos not in edits:
+                    # Voltou ao valor original: deixa de ser sobrescrita
+                    del self._effective[pos]
+            changes = changes._replace(updated=new_rows,
+                                       deleted=self.base.iloc[[p for p in touched if p in deleted]])
+
+        if added != self._applied_added:
+            changes = changes._replace(previous_added=self._added)
+            self.aggregates.add(self._added, sign=-1)
+            new_added = pd.DataFrame(added, columns=self.base.columns)
+            self._added = self._derive(self._coerce(new_added)) if added else self.base.iloc[0:0]
+            self.aggregates.add(self._added)
+            changes = changes._replace(added=self._added)
+
+        self._applied_edits = {p: dict(v) for p, v in edits.items()}
+        self._applied_deleted = deleted
+        self._applied_added = [dict(r) for r in added]
+        return changes
+
+    def overdue_frame(self) -> pd.DataFrame:
+        """
+        Parcelas com Status 'Atrasado' já considerando as edições (custo ~ nº de atrasadas).
+        Retorna no esquema compacto (dinheiro em centavos).
+        """
+        keep = [p for p in self._base_overdue if p not in self._effective]
+        parts = [self.base.iloc[keep]]
+        edited = [row for row in self._effective.values() if row is not None and row.get('Status') == 'Atrasado']
+        if edited:
+            parts.append(pd.DataFrame(edited, columns=self.base.columns))
+        if not self._added.empty:
+            parts.append(self._added[self._added['Status'] == 'Atrasado'])
+        parts = [p for p in parts if not p.empty]
+        return pd.concat(parts, ignore_index=True) if parts else self.base.iloc[0:0]
+
+    def patch_derived(self, edited_df: pd.DataFrame) -> pd.DataFrame:
+        """Atualiza as colunas derivadas das linhas editadas/adicionadas no retorno do editor."""
+        for pos, row in self._effective.items():
+            label = self.base.index[pos]
+            if row is not None and label in edited_df.index:
+                for col in DERIVED_COLUMNS:
+                    value = row[col]
+                    edited_df.at[label, col] = schema.to_reais(value) if col in schema.MONEY_COLUMNS else value
+        if not self._added.empty and len(edited_df) >= len(self._added):
+            tail = edited_df.index[-len(self._added):]
+            for col in DERIVED_COLUMNS:
+                values = self._added[col].to_numpy()
+                edited_df.loc[tail, col] = schema.to_reais(values) if col in schema.MONEY_COLUMNS else values
+        return edited_df
@@ -0,0 +1,216 @@
+import json
+import logging
+import sqlite3
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Séries mensais (% a.m.) do SGS/BCB
+SERIES_CODES = {'IPCA': 433, 'IGP-M': 189}
+
+SGS_BASE_URL = "https://api.bcb.gov.br/dados/serie"
+DEFAULT_DB_PATH = Path(__file__).parent / '.data' / 'inflation.sqlite'
+
+# Intervalo mínimo entre consultas ao BCB pelo mês mais recente (ainda não publicado)
+REFRESH_INTERVAL = timedelta(hours=12)
+
+
+def bcb_fetcher(code: int, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+    """Busca a série no SGS usando python-bcb (fetcher padrão)."""
+    from bcb import sgs
+    df = sgs.get({'valor': code}, start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'))
+    return df['valor'] if df is not None and not df.empty else pd.Series(dtype=float)
+
+
+def make_http_fetcher(base_url: str = SGS_BASE_URL, timeout: float = 30.0):
+    """
+    Cria um fetcher que fala diretamente com a API JSON do SGS.
+    Aceita qualquer base_url compatível (ex.: um servidor local que simula o BCB em testes).
+    """
+    def fetch(code: int, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+        query = urlencode({
+            'formato': 'json',
+            'dataInicial': start.strftime('%d/%m/%Y'),
+            'dataFinal': end.strftime('%d/%m/%Y'),
+        })
+        url = f"{base_url.rstrip('/')}/bcdata.sgs.{code}/dados?{query}"
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            rows = json.loads(resp.read().decode('utf-8'))
+        if not rows:
+            return pd.Series(dtype=float)
+        return pd.Series(
+            [float(r['valor']) for r in rows],
+            index=pd.to_datetime([r['data'] for r in rows], format='%d/%m/%Y'),
+        )
+    return fetch
+
+
+def _month_start(value) -> pd.Timestamp:
+    return pd.Timestamp(value).to_period('M').to_timestamp()
+
+
+def _month_code(value) -> int:
+    ts = pd.Timestamp(value)
+    return ts.year * 12 + ts.month - 1
+
+
+def _code_to_month(code: int) -> pd.Timestamp:
+    year, month = divmod(int(code), 12)
+    return pd.Timestamp(year, month + 1, 1)
+
+
+def _merge_intervals(intervals) -> list:
+    """Une intervalos [início, fim] de códigos de mês que se sobrepõem ou se tocam."""
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return [tuple(i) for i in merged]
+
+
+class InflationStore:
+    """
+    Armazena localmente (SQLite) as séries mensais de inflação do BCB.
+    Busca apenas os meses ausentes, atende qualquer intervalo a partir do disco
+    e continua funcionando offline com o último snapshot gravado.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, fetcher=bcb_fetcher):
+        self.db_path = Path(db_path)
+        self.fetcher = fetcher
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series_values ("
+                " code INTEGER NOT NULL, date TEXT NOT NULL, value REAL NOT NULL,"
+                " PRIMARY KEY (code, date))"
+            )
+            # Intervalos de meses (códigos ano*12 + mês-1) já consultados ao BCB e resolvidos:
+            # até o último mês publicado, com ou sem dados (meses sem publicação não voltam a ser pedidos)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series_coverage ("
+                " code INTEGER NOT NULL, first_month INTEGER NOT NULL, last_month INTEGER NOT NULL,"
+                " PRIMARY KEY (code, first_month))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series_fetch (code INTEGER PRIMARY KEY, last_fetch TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _coverage(self, conn, code) -> list:
+        return conn.execute(
+            "SELECT first_month, last_month FROM series_coverage WHERE code = ? ORDER BY first_month", (code,)
+        ).fetchall()
+
+    def _latest_month(self, conn, code):
+        (hi,) = conn.execute("SELECT MAX(date) FROM series_values WHERE code = ?", (code,)).fetchone()
+        return _month_code(hi) if hi else None
+
+    def _missing_ranges(self, conn, code, start, end):
+        """
+        Sub-intervalos (início, fim) do pedido ainda não cobertos pelas consultas anteriores.
+        Lacunas antes do último mês publicado são sempre buscadas; os meses depois dele
+        (ainda não divulgados) só a cada REFRESH_INTERVAL, para não consultar o BCB a cada chamada.
+        """
+        lo, hi = _month_code(start), _month_code(end)
+        gaps, cursor = [], lo
+        for first, last in self._coverage(conn, code):
+            if last < cursor or first > hi:
+                continue
+            if first > cursor:
+                gaps.append((cursor, first - 1))
+            cursor = max(cursor, last + 1)
+        if cursor <= hi:
+            gaps.append((cursor, hi))
+
+        latest = self._latest_month(conn, code)
+        row = conn.execute("SELECT last_fetch FROM series_fetch WHERE code = ?", (code,)).fetchone()
+        recent = row is not None and datetime.now() - datetime.fromisoformat(row[0]) < REFRESH_INTERVAL
+        ranges = []
+        for first, last in gaps:
+            if recent and (latest is None or first > latest):
+                continue
+            ranges.append((_code_to_month(first), _code_to_month(last)))
+        return ranges
+
+    def _mark_covered(self, conn, code, start, end):
+        """Registra [start, end] como consultado, só até o último mês publicado da série."""
+        latest = self._latest_month(conn, code)
+        first, last = _month_code(start), _month_code(end)
+        if latest is not None:
+            last = min(last, latest)
+            if last >= first:
+                intervals = _merge_intervals(self._coverage(conn, code) + [(first, last)])
+                conn.execute("DELETE FROM series_coverage WHERE code = ?", (code,))
+                conn.executemany("INSERT INTO series_coverage (code, first_month, last_month) VALUES (?, ?, ?)",
+                                 [(code, a, b) for a, b in intervals])
+        conn.execute("INSERT OR REPLACE INTO series_fetch (code, last_fetch) VALUES (?, ?)",
+                     (code, datetime.now().isoformat()))
+
+    def sync(self, code: int, start, end=None) -> int:
+        """Baixa os meses ausentes do intervalo. Retorna o número de meses gravados."""
+        start = _month_start(start)
+        end = _month_start(end if end is not None else pd.Timestamp.now())
+        written = 0
+        with self._connect() as conn:
+            for r_start, r_end in self._missing_ranges(conn, code, start, end):
+                try:
+                    fetched = self.fetcher(code, r_start, r_end + pd.offsets.MonthEnd(0))
+                except Exception as e:
+                    logger.warning("Falha ao buscar série %s no BCB (usando dados locais): %s", code, e)
+                    continue
+                rows = [
+                    (code, _month_start(d).strftime('%Y-%m-%d'), float(v))
+                    for d, v in fetched.dropna().items()
+                ]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO series_values (code, date, value) VALUES (?, ?, ?)", rows
+                )
+                self._mark_covered(conn, code, r_start, r_end)
+                written += len(rows)
+        return written
+
+    def read(self, code: int, start=None, end=None) -> pd.Series:
+        """Lê a série do disco, sem acessar a rede."""
+        query = "SELECT date, value FROM series_values WHERE code = ?"
+        params = [code]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(_month_start(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(_month_start(end).strftime('%Y-%m-%d'))
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY date", params).fetchall()
+        return pd.Series(
+            [v for _, v in rows],
+            index=pd.DatetimeIndex([d for d, _ in rows], name='Date'),
+            dtype=float,
+        )
+
+    def get(self, indicator: str, start, end=None):
+        """
+        Retorna a série no mesmo formato de sgs.get (DataFrame com uma coluna por indicador),
+        sincronizando antes apenas o que faltar.
+        """
+        if indicator not in SERIES_CODES:
+            return None
+        code = SERIES_CODES[indicator]
+        self.sync(code, start, end)
+        return self.read(code, start, end).to_frame(indicator)
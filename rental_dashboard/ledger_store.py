@@ -0,0 +1,200 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import diagnostics
+import schema
+from pipeline import DERIVED_COLUMNS, SOURCE_COLUMN
+from schema import ID_COLUMN
+
+DEFAULT_DB_PATH = Path(__file__).parent / '.data' / 'ledger.sqlite'
+
+# Colunas da carteira -> colunas da tabela
+# (as DERIVED_COLUMNS dependem da data de referência e das taxas: não são gravadas)
+CORE_COLUMNS = {
+    'Inquilino': 'inquilino',
+    'Imóvel': 'imovel',
+    'Vencimento': 'vencimento',
+    'Valor': 'valor',
+    'Status': 'status',
+    'Pago_em': 'pago_em',
+    SOURCE_COLUMN: 'arquivo',
+}
+DATE_FIELDS = ('vencimento', 'pago_em')
+# Vencimento ausente/inválido é gravado como '' (e não NULL): no SQLite NULLs são
+# distintos entre si e escapariam da chave única, duplicando a parcela a cada upload
+NO_DATE = ''
+
+_UPSERT = (
+    "INSERT INTO parcelas (id, inquilino, imovel, vencimento, valor, status, pago_em, arquivo, extras, atualizado_em)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT (inquilino, imovel, vencimento) DO UPDATE SET"
+    " valor = excluded.valor, status = excluded.status, pago_em = excluded.pago_em,"
+    " arquivo = COALESCE(excluded.arquivo, arquivo), extras = excluded.extras,"
+    " atualizado_em = excluded.atualizado_em"
+)
+
+
+def _iso_dates(values, missing=None) -> list:
+    """datetime64 -> 'AAAA-MM-DD' (`missing` para NaT), vetorizado."""
+    dates = pd.to_datetime(pd.Series(values), errors='coerce').to_numpy(dtype='datetime64[D]')
+    text = np.datetime_as_string(dates, unit='D').astype(object)
+    text[np.isnat(dates)] = missing
+    return text.tolist()
+
+
+def _text(values, default=None) -> list:
+    series = pd.Series(values).astype(object)
+    return series.where(series.notna(), default).tolist()
+
+
+class LedgerStore:
+    """
+    Base local (SQLite) das parcelas: sistema de registro da carteira entre sessões.
+    Uploads entram por upsert na chave (Inquilino, Imóvel, Vencimento), as edições do
+    editor são gravadas na hora e o dashboard lê só o período exibido.
+    Dinheiro em centavos (INTEGER), datas em texto ISO (ordenáveis e indexáveis).
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parcelas ("
+                " id INTEGER PRIMARY KEY,"
+                " inquilino TEXT NOT NULL, imovel TEXT NOT NULL DEFAULT '', vencimento TEXT NOT NULL DEFAULT '',"
+                " valor INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT 'Pendente',"
+                " pago_em TEXT, arquivo TEXT, extras TEXT, atualizado_em TEXT NOT NULL,"
+                " UNIQUE (inquilino, imovel, vencimento))"
+            )
+            # A restrição UNIQUE já indexa por inquilino (primeira coluna da chave); o período
+            # (com ou sem filtro de status) usa o índice composto
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parcelas_vencimento_status ON parcelas (vencimento, status)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Escrita ---
+    def _rows(self, df: pd.DataFrame) -> list:
+        """Linhas para _UPSERT a partir de uma carteira (esquema compacto ou em reais)."""
+        n = len(df)
+        none = [None] * n
+        ids = _text(df[ID_COLUMN]) if ID_COLUMN in df.columns else none
+        ids = [int(i) if i is not None else None for i in ids]
+        valor = df['Valor'] if 'Valor' in df.columns else pd.Series(0, index=df.index)
+        valor = valor.to_numpy() if schema.is_compact(df) else schema.to_centavos(valor)
+        extra_cols = [c for c in df.columns if c not in CORE_COLUMNS and c not in DERIVED_COLUMNS and c != ID_COLUMN]
+        extras = (df[extra_cols].to_json(orient='records', lines=True, date_format='iso', force_ascii=False).splitlines()
+                  if extra_cols and n else none)
+        now = datetime.now().isoformat(timespec='seconds')
+        return list(zip(
+            ids,
+            _text(df['Inquilino'], ''),
+            _text(df['Imóvel'], '') if 'Imóvel' in df.columns else [''] * n,
+            _iso_dates(df['Vencimento'], NO_DATE),
+            [int(v) for v in valor],
+            _text(df['Status'], 'Pendente') if 'Status' in df.columns else ['Pendente'] * n,
+            _iso_dates(df['Pago_em']) if 'Pago_em' in df.columns else none,
+            _text(df[SOURCE_COLUMN]) if SOURCE_COLUMN in df.columns else none,
+            extras,
+            [now] * n,
+        ))
+
+    @diagnostics.timed('store_upsert')
+    def upsert(self, df: pd.DataFrame) -> tuple:
+        """
+        Grava a carteira: parcelas novas são inseridas e as já existentes (mesma chave)
+        atualizadas. Retorna (inseridas, atualizadas).
+        """
+        rows = self._rows(df)
+        with self._connect() as conn:
+            before = self.count(conn)
+            conn.executemany(_UPSERT, rows)
+            inserted = self.count(conn) - before
+        return inserted, len(rows) - inserted
+
+    def write_through(self, changes):
+        """
+        Grava as mudanças de uma edição (incremental.LedgerChanges): linhas alteradas
+        (pelo ID, aceitando troca de chave), excluídas e adicionadas no editor.
+        """
+        removed = [int(i) for i in pd.concat([changes.updated.get(ID_COLUMN, pd.Series(dtype=float)),
+                                              changes.deleted.get(ID_COLUMN, pd.Series(dtype=float))]).dropna()]
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM parcelas WHERE id = ?", [(i,) for i in removed])
+            if not changes.previous_added.empty:
+                previous = self._rows(changes.previous_added)
+                conn.executemany("DELETE FROM parcelas WHERE inquilino = ? AND imovel = ? AND vencimento = ?",
+                                 [r[1:4] for r in previous])
+            for frame in (changes.updated, changes.added):
+                if not frame.empty:
+                    conn.executemany(_UPSERT, self._rows(frame))
+
+    # --- Leitura ---
+    def count(self, conn=None) -> int:
+        if conn is None:
+            with self._connect() as conn:
+                return self.count(conn)
+        return conn.execute("SELECT COUNT(*) FROM parcelas").fetchone()[0]
+
+    def count_undated(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM parcelas WHERE vencimento = ?", (NO_DATE,)).fetchone()[0]
+
+    def bounds(self):
+        """(primeiro vencimento, último vencimento) gravados, ou None se a base está vazia."""
+        with self._connect() as conn:
+            lo, hi = conn.execute("SELECT MIN(vencimento), MAX(vencimento) FROM parcelas WHERE vencimento <> ?",
+                                  (NO_DATE,)).fetchone()
+        return (pd.Timestamp(lo), pd.Timestamp(hi)) if lo else None
+
+    @diagnostics.timed('store_query')
+    def query(self, start=None, end=None, undated: bool = True) -> pd.DataFrame:
+        """
+        Parcelas com vencimento no período (consulta pelo índice de vencimento),
+        no esquema compacto e com a coluna ID. As parcelas sem vencimento não pertencem
+        a nenhum período: entram em toda consulta (Vencimento NaT) se `undated`.
+        """
+        clauses, params = ["vencimento <> ?"], [NO_DATE]
+        if start is not None:
+            clauses.append("vencimento >= ?")
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            clauses.append("vencimento <= ?")
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        where = " WHERE (" + " AND ".join(clauses) + ")"
+        if undated:
+            where += " OR vencimento = ?"
+            params.append(NO_DATE)
+        sql = (f"SELECT id, inquilino, imovel, vencimento, valor, status, pago_em, arquivo, extras"
+               f" FROM parcelas{where} ORDER BY vencimento, id")
+        with self._connect() as conn:
+            raw = pd.read_sql_query(sql, conn, params=params)
+        return self._to_ledger(raw)
+
+    @staticmethod
+    def _to_ledger(raw: pd.DataFrame) -> pd.DataFrame:
+        names = {v: k for k, v in CORE_COLUMNS.items()}
+        df = raw.drop(columns='extras').rename(columns={'id': ID_COLUMN, **names})
+        for col in DATE_FIELDS:
+            df[names[col]] = pd.to_datetime(raw[col], format='%Y-%m-%d', errors='coerce')
+        df['Valor'] = raw['valor'].astype(np.int64)
+        if df[SOURCE_COLUMN].isna().all():
+            df = df.drop(columns=SOURCE_COLUMN)
+        extras = raw['extras'].dropna()
+        if not extras.empty:
+            parsed = pd.DataFrame([json.loads(e) for e in extras], index=extras.index)
+            df = df.join(parsed.reindex(raw.index))
+        return schema.compact(df)
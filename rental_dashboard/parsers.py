@@ -0,0 +1,171 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_SIZE = 1000
+DEDUP_MIN_ROWS = 10_000
+
+# Estilos numéricos: 'br' = 1.234,56 | 'plain' = 1234.56 / 1,234.56
+MONEY_BR = 'br'
+MONEY_PLAIN = 'plain'
+
+_CURRENCY_NOISE = re.compile(r'R\$|\s| ')
+_DOT_THOUSANDS = re.compile(r'^-?\d{1,3}(\.\d{3})+$')
+
+# Formatos de data testados, na ordem de preferência (pt-BR primeiro)
+DATE_FORMATS = [
+    '%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d',
+]
+
+
+def _sample(values, size: int = SAMPLE_SIZE) -> pd.Series:
+    """Amostra (sem nulos) como object, convertendo só as linhas sorteadas."""
+    values = pd.Series(values).dropna()
+    if len(values) > size:
+        values = values.sample(size, random_state=0)
+    return values.astype(object)
+
+
+def _money_votes(values) -> dict:
+    """Conta, numa amostra, os valores que só fazem sentido em cada estilo numérico."""
+    sample = _sample(values)
+    sample = sample[sample.map(lambda v: isinstance(v, str))]
+    votes = {MONEY_BR: 0, MONEY_PLAIN: 0}
+    for raw in sample:
+        text = _CURRENCY_NOISE.sub('', raw)
+        has_dot, has_comma = '.' in text, ',' in text
+        if has_dot and has_comma:
+            votes[MONEY_BR if text.rfind(',') > text.rfind('.') else MONEY_PLAIN] += 1
+        elif has_comma:
+            votes[MONEY_BR] += 1
+        elif has_dot and not _DOT_THOUSANDS.match(text):
+            votes[MONEY_PLAIN] += 1
+    return votes
+
+
+def infer_money_style(values) -> str:
+    """
+    Decide, por amostragem, se a coluna usa vírgula decimal (pt-BR) ou ponto decimal.
+    Valores como '1.500' (só ponto em grupos de 3) são ambíguos e, sem outro indício, contam como pt-BR.
+    """
+    votes = _money_votes(values)
+    return MONEY_PLAIN if votes[MONEY_PLAIN] > votes[MONEY_BR] else MONEY_BR
+
+
+def _on_uniques(values: pd.Series, func) -> pd.Series:
+    """Aplica `func` só aos valores distintos e expande o resultado para a coluna inteira."""
+    codes, uniques = pd.factorize(values)
+    parsed = func(pd.Series(uniques, dtype=values.dtype)).to_numpy()
+    result = parsed[codes] if len(parsed) else np.empty(len(codes), dtype=parsed.dtype)
+    if (codes < 0).any():
+        result = pd.Series(result).where(codes >= 0).to_numpy()
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def parse_money(values: pd.Series, style: str = None) -> pd.Series:
+    """
+    Converte uma coluna monetária ('R$ 1.234,56', '1234.56', números) em float.
+    O estilo é inferido uma vez por coluna e aplicado em lote; só colunas que misturam
+    os dois estilos são resolvidas valor a valor. Valores inválidos viram NaN.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    if len(values) >= DEDUP_MIN_ROWS:
+        # Aluguéis se repetem mês a mês: converter só os valores distintos é bem mais barato
+        if style is None:
+            style = infer_money_style(values)
+        return _on_uniques(values, lambda u: _parse_money_values(u, style, _money_votes(u)))
+    return _parse_money_values(values, style, _money_votes(values))
+
+
+def _parse_money_values(values: pd.Series, style, votes) -> pd.Series:
+    """Conversão vetorizada de parse_money (sem deduplicação)."""
+    if style is None:
+        style = MONEY_PLAIN if votes[MONEY_PLAIN] > votes[MONEY_BR] else MONEY_BR
+
+    # Colunas object podem misturar números (Excel) e textos
+    all_text = pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty')
+    if all_text:
+        text = values
+    else:
+        is_text = values.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        numeric = pd.to_numeric(values.where(~is_text), errors='coerce')
+        text = values.where(is_text)
+
+    text = (text.astype(str)
+                .str.replace('R$', '', regex=False)
+                .str.replace('\xa0', '', regex=False)
+                .str.replace(' ', '', regex=False))
+    if votes[MONEY_BR] and votes[MONEY_PLAIN]:
+        # Estilos misturados: a posição do último separador decide; ambíguos seguem a coluna
+        comma_decimal = text.str.rfind(',') > text.str.rfind('.')
+        ambiguous = text.str.match(_DOT_THOUSANDS).fillna(False).astype(bool)
+        as_br = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        text = as_br.where(comma_decimal | (ambiguous & (style == MONEY_BR)), text.str.replace(',', '', regex=False))
+    elif style == MONEY_BR:
+        text = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    else:
+        text = text.str.replace(',', '', regex=False)
+
+    try:
+        result = text.astype(float)
+    except (ValueError, TypeError):
+        result = pd.to_numeric(text, errors='coerce').astype(float)
+    if not all_text:
+        result = result.where(is_text, numeric)
+    return result.rename(values.name)
+
+
+def infer_date_formats(values) -> list:
+    """Formatos de data presentes na amostra, do mais frequente para o menos frequente."""
+    sample = _sample(values)
+    sample = sample[sample.map(lambda v: isinstance(v, str))].str.strip()
+    if sample.empty:
+        return []
+    hits = []
+    for fmt in DATE_FORMATS:
+        ok = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if ok:
+            hits.append((-ok, DATE_FORMATS.index(fmt), fmt))
+    return [fmt for _, _, fmt in sorted(hits)]
+
+
+def parse_dates(values: pd.Series, formats: list = None) -> pd.Series:
+    """
+    Converte uma coluna de datas (dd/mm/aaaa, ISO, objetos datetime) em datetime64.
+    Os formatos são inferidos por amostragem e aplicados em lote sobre os valores únicos;
+    o que sobrar é convertido com format='mixed', dayfirst=True. Valores inválidos viram NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    if formats is None:
+        formats = infer_date_formats(uniques)
+
+    is_text = uniques.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    text = uniques.where(is_text).str.strip()
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    if (~is_text).any():
+        parsed[~is_text] = pd.to_datetime(uniques[~is_text], errors='coerce')
+
+    pending = is_text.copy()
+    for fmt in formats:
+        if not pending.any():
+            break
+        converted = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+        parsed[pending] = converted
+        pending &= parsed.isna().to_numpy()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(text[pending], errors='coerce', dayfirst=True, format='mixed')
+
+    # Coluna toda nula (ex.: ninguém pagou ainda): não há valores distintos para expandir
+    if len(parsed):
+        result = parsed.to_numpy()[codes]
+        result[codes < 0] = np.datetime64('NaT')
+    else:
+        result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+    return pd.Series(result, index=values.index, name=values.name)
@@ -0,0 +1,237 @@
+import contextvars
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
+
+import pandas as pd
+
+import data_loader
+import diagnostics
+import exports
+import financial_engine
+import schema
+from cube import AggregateCube
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['Inquilino', 'Vencimento', 'Valor']
+DERIVED_COLUMNS = ['Dias Atraso', 'Multa Est.', 'Juros Est.', 'Total Devido']
+# Coluna com o arquivo de origem de cada parcela quando várias carteiras são mescladas
+SOURCE_COLUMN = 'Arquivo'
+# Parcelas com a mesma chave em arquivos (ou linhas) diferentes são tratadas como duplicadas
+DUPLICATE_KEY = ['Inquilino', 'Imóvel', 'Vencimento']
+
+
+class MissingColumnsError(data_loader.DataLoadError):
+    """A planilha não tem as colunas obrigatórias (mesmo após a normalização)."""
+
+    def __init__(self, missing):
+        self.missing = list(missing)
+        super().__init__(f"Colunas faltando: {', '.join(self.missing)}")
+
+
+class LedgerReport(NamedTuple):
+    """Carteira com colunas derivadas (esquema compacto) e o cubo de agregados."""
+    ledger: pd.DataFrame
+    cube: AggregateCube
+
+    def kpis(self) -> dict:
+        """Indicadores da seção 'Performance Financeira', em reais."""
+        return {
+            'Parcelas': len(self.ledger),
+            'Receita Confirmada': schema.to_reais(self.cube.status_total('Pago')),
+            'Inadimplência Total': schema.to_reais(self.cube.overdue_total),
+            'Contratos Atrasados': self.cube.overdue_count,
+            'Receita Futura/Pendente': schema.to_reais(self.cube.status_total('Pendente')),
+        }
+
+
+def prepare_ledger(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza colunas, valida as obrigatórias, padroniza tipos e aplica o esquema compacto.
+    Levanta MissingColumnsError/DataLoadError em caso de problema; não depende de Streamlit.
+    """
+    norm_df = data_loader.smart_normalize_columns(raw_df)
+    missing = [c for c in REQUIRED_COLUMNS if c not in norm_df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+    try:
+        typed = data_loader.coerce_types(norm_df)
+        # Esquema compacto: centavos, categóricos e datetime64
+        with diagnostics.stage('compact', rows=len(typed)):
+            return schema.compact(typed)
+    except Exception as e:
+        raise data_loader.DataLoadError(f"Erro ao processar dados: {e}") from e
+
+
+def load_ledger(file, **read_options) -> pd.DataFrame:
+    """
+    Lê (CSV/XLSX) e prepara uma carteira a partir de um arquivo aberto em modo binário.
+    `read_options` vão para data_loader.load_data (ex.: sheet_name e header_row do XLSX).
+    """
+    return prepare_ledger(data_loader.load_data(file, **read_options))
+
+
+def source_labels(files) -> list:
+    """
+    Rótulo de origem de cada arquivo, na ordem recebida: o nome, com ' (2)', ' (3)'...
+    nos nomes repetidos. Chave das opções de leitura, dos erros e de SOURCE_COLUMN.
+    """
+    labels, used = [], set()
+    for f in files:
+        label, n = f.name, 1
+        while label in used:
+            n += 1
+            label = f"{f.name} ({n})"
+        used.add(label)
+        labels.append(label)
+    return labels
+
+
+def _load_ledger_in_process(data: bytes, name: str, read_options: dict) -> tuple:
+    """
+    Executado num processo do pool: lê a carteira a partir dos bytes do arquivo.
+    Devolve (DataFrame ou None, mensagem de erro ou None, registros das etapas).
+    """
+    file = io.BytesIO(data)
+    file.name = name
+    with diagnostics.recording() as run:
+        try:
+            df, error = load_ledger(file, **read_options), None
+        except data_loader.DataLoadError as e:
+            df, error = None, str(e)
+    return df, error, run.records
+
+
+def _thread_result(future) -> tuple:
+    try:
+        return future.result(), None, []
+    except data_loader.DataLoadError as e:
+        return None, str(e), []
+
+
+def _process_result(future, file, read_options: dict) -> tuple:
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        # Sem processos disponíveis (ex.: ambiente restrito): lê nesta thread mesmo
+        logger.warning("Pool de processos indisponível, lendo %s na thread atual: %s", file.name, e)
+        try:
+            return load_ledger(file, **read_options), None, []
+        except data_loader.DataLoadError as err:
+            return None, str(err), []
+
+
+def load_ledgers(files, max_workers: int = None, read_options: dict = None, labels=None) -> tuple:
+    """
+    Lê e prepara várias carteiras em paralelo. O tempo total fica próximo ao do maior arquivo:
+    CSVs em threads (o parser C do pandas libera o GIL); quando há mais de um XLSX, eles vão
+    para processos (havendo mais de um núcleo), porque o parse do openpyxl/calamine segura o GIL.
+    As etapas medidas nos workers entram na execução de diagnostics.recording() atual.
+    `read_options` mapeia rótulo do arquivo -> opções de leitura (aba e cabeçalho do XLSX);
+    `labels` são os rótulos dos arquivos (padrão: source_labels(files)). Retorna (lista de DataFrames na ordem recebida, com None nos que
+    falharam, {rótulo do arquivo: mensagem de erro}).
+    """
+    files = list(files)
+    if not files:
+        return [], {}
+    read_options = read_options or {}
+    labels = source_labels(files) if labels is None else list(labels)
+    options = [read_options.get(label, {}) for label in labels]
+    workers = max_workers or min(len(files), 8)
+    workbooks = [i for i, f in enumerate(files) if f.name.lower().endswith('.xlsx')]
+    # Com um único núcleo os processos só somariam o custo de subir o pool
+    cpus = os.cpu_count() or 1
+    in_process = set(workbooks) if len(workbooks) > 1 and cpus > 1 else set()
+
+    results = []
+    process_pool = (ProcessPoolExecutor(max_workers=min(workers, cpus, len(in_process)),
+                                        mp_context=multiprocessing.get_context('forkserver'))
+                    if in_process else None)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for i, f in enumerate(files):
+                if i in in_process:
+                    f.seek(0)
+                    futures.append(process_pool.submit(_load_ledger_in_process, f.read(), f.name, options[i]))
+                else:
+                    # Cada thread roda numa cópia do contexto: as etapas caem na execução atual
+                    ctx = contextvars.copy_context()
+                    futures.append(pool.submit(ctx.run, load_ledger, f, **options[i]))
+            for i, (f, future) in enumerate(zip(files, futures)):
+                results.append(_process_result(future, f, options[i]) if i in in_process
+                               else _thread_result(future))
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    frames, errors = [], {}
+    for label, (df, error, records) in zip(labels, results):
+        diagnostics.add_records(records)
+        frames.append(df)
+        if error is not None:
+            errors[label] = error
+    return frames, errors
+
+
+def duplicate_mask(df: pd.DataFrame, keep=False) -> pd.Series:
+    """Parcelas repetidas pela chave (Inquilino, Imóvel, Vencimento); keep como em DataFrame.duplicated."""
+    key = [c for c in DUPLICATE_KEY if c in df.columns]
+    if not key:
+        return pd.Series(False, index=df.index)
+    return df.duplicated(key, keep=keep)
+
+
+@diagnostics.timed('merge_ledgers')
+def merge_ledgers(frames) -> pd.DataFrame:
+    """
+    Mescla carteiras já preparadas [(rótulo, df), ...] num único DataFrame com as colunas
+    alinhadas, marcando a origem em SOURCE_COLUMN (rótulos de source_labels, únicos). O nº de parcelas duplicadas
+    (todas as ocorrências) fica em df.attrs['duplicates'].
+    """
+    tagged = [df.assign(**{SOURCE_COLUMN: name}) for name, df in frames]
+    if not tagged:
+        raise data_loader.DataLoadError("Nenhuma planilha pôde ser carregada.")
+    # Categóricos com categorias diferentes viram object no concat; compact refaz o esquema
+    merged = pd.concat(tagged, ignore_index=True, sort=False)
+    merged = schema.compact(merged)
+    merged[SOURCE_COLUMN] = merged[SOURCE_COLUMN].astype('category')
+    merged.attrs['duplicates'] = int(duplicate_mask(merged).sum())
+    return merged
+
+
+@diagnostics.timed('arrears')
+def add_derived_columns(df: pd.DataFrame, reference_date, late_fee_percent: float,
+                        monthly_interest_rate: float) -> pd.DataFrame:
+    """Acrescenta Dias Atraso, Multa, Juros e Total Devido calculados em lote."""
+    arrears = financial_engine.calculate_arrears_batch(
+        df['Valor'], df['Vencimento'], df.get('Status'),
+        reference_date=reference_date, late_fee_percent=late_fee_percent,
+        monthly_interest_rate=monthly_interest_rate
+    )
+    df['Dias Atraso'] = arrears.days_late
+    df['Multa Est.'] = arrears.late_fee
+    df['Juros Est.'] = arrears.interest
+    df['Total Devido'] = arrears.total
+    return df
+
+
+def build_report(df: pd.DataFrame, reference_date=None, late_fee_percent: float = 10.0,
+                 monthly_interest_rate: float = 1.0) -> LedgerReport:
+    """Calcula atrasos e agregados de uma carteira já preparada."""
+    if reference_date is None:
+        reference_date = pd.Timestamp.now()
+    ledger = add_derived_columns(df.copy(), reference_date, late_fee_percent, monthly_interest_rate)
+    with diagnostics.stage('aggregate', rows=len(ledger)):
+        cube = AggregateCube.from_frame(ledger)
+    return LedgerReport(ledger, cube)
+
+
+def export_csv(df: pd.DataFrame) -> bytes:
+    """Relatório completo em CSV (UTF-8, valores em reais)."""
+    return exports.serialize(df, 'CSV')
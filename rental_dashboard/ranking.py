@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+RANK_KEYS = ['Dias Atraso', 'Total Devido']
+GROUP_OPTIONS = ['Parcela', 'Inquilino', 'Imóvel', 'Inquilino/Imóvel']
+DEFAULT_PAGE_SIZE = 50
+
+
+def top_n_positions(values, n: int) -> np.ndarray:
+    """
+    Posições dos n maiores valores, em ordem decrescente (empates pela posição original).
+    Usa seleção parcial (np.partition) em vez de ordenar tudo: O(len + k log k),
+    onde k são os n maiores mais os empatados com o n-ésimo.
+    """
+    values = np.asarray(values, dtype=float)
+    values = np.where(np.isnan(values), -np.inf, values)
+    total = len(values)
+    n = max(0, min(int(n), total))
+    if n == 0:
+        return np.array([], dtype=np.intp)
+    if n < total:
+        threshold = np.partition(values, total - n)[total - n]
+        candidates = np.flatnonzero(values >= threshold)
+    else:
+        candidates = np.arange(total)
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order[:n]]
+
+
+def aggregate_debtors(df: pd.DataFrame, by) -> pd.DataFrame:
+    """
+    Consolida as parcelas atrasadas por devedor: Valor e Total Devido somados,
+    maior Dias Atraso e nº de parcelas.
+    """
+    by = [c for c in ([by] if isinstance(by, str) else list(by)) if c in df.columns]
+    if not by:
+        return df
+    agg = {'Parcelas': ('Valor', 'size'), 'Dias Atraso': ('Dias Atraso', 'max'),
+           'Valor': ('Valor', 'sum'), 'Total Devido': ('Total Devido', 'sum')}
+    # Categóricos são agrupados pelos códigos inteiros (bem mais rápido com muitas categorias)
+    categorical = {c: df[c].dtype for c in by if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    keys = [df[c].cat.codes.rename(c) if c in categorical else df[c] for c in by]
+    grouped = df.groupby(keys, sort=False, dropna=False).agg(**agg).reset_index()
+    for col, dtype in categorical.items():
+        grouped[col] = pd.Categorical.from_codes(grouped[col], dtype=dtype)
+    return grouped
+
+
+class OverdueRanking:
+    """
+    Ranking paginado das parcelas (ou devedores) em atraso.
+    Cada página é montada por seleção parcial dos primeiros (página+1)*page_size itens,
+    então só as linhas da página são ordenadas e enviadas ao navegador.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: str = 'Dias Atraso', group_by: str = 'Parcela',
+                 page_size: int = DEFAULT_PAGE_SIZE):
+        if key not in RANK_KEYS:
+            raise ValueError(f"Chave de ranking desconhecida: {key} (use {', '.join(RANK_KEYS)})")
+        if group_by != 'Parcela':
+            df = aggregate_debtors(df, group_by.split('/'))
+        self.frame = df
+        self.key = key
+        self.page_size = max(1, int(page_size))
+        self._values = df[key].to_numpy(dtype=float) if key in df.columns else np.zeros(len(df))
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def pages(self) -> int:
+        return max(1, math.ceil(len(self.frame) / self.page_size))
+
+    def top(self, n: int) -> pd.DataFrame:
+        """Os n primeiros do ranking."""
+        return self.frame.iloc[top_n_positions(self._values, n)]
+
+    def page(self, number: int) -> pd.DataFrame:
+        """Página `number` (começando em 1) do ranking."""
+        number = min(max(1, int(number)), self.pages)
+        start = (number - 1) * self.page_size
+        return self.top(start + self.page_size).iloc[start:]
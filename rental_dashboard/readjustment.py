@@ -0,0 +1,109 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Colunas padrão (ver data_loader.COLUMN_SYNONYMS)
+ANNIVERSARY_COLUMN = 'Aniversario'
+INDEX_COLUMN = 'Indice'
+
+
+def to_month_code(dates) -> np.ndarray:
+    """Converte datas em códigos inteiros de mês (ano*12 + mês-1). NaT vira -1."""
+    idx = pd.DatetimeIndex(dates)
+    codes = idx.year.to_numpy(dtype='float64') * 12 + idx.month.to_numpy(dtype='float64') - 1
+    return np.where(np.isnan(codes), -1, codes).astype(np.int64)
+
+
+class IndexTable:
+    """
+    Tabela de índice acumulado (juros compostos) de uma série mensal em %.
+    cumulative[i] é o fator acumulado dos i primeiros meses da série, com cumulative[0] = 1,
+    de modo que o fator entre dois meses é uma razão de duas posições da tabela.
+    """
+
+    def __init__(self, months: np.ndarray, cumulative: np.ndarray):
+        self.months = months
+        self.cumulative = cumulative
+
+    @classmethod
+    def from_series(cls, series):
+        """Monta a tabela a partir do retorno de get_inflation_index (Series ou DataFrame de 1 coluna)."""
+        if isinstance(series, pd.DataFrame):
+            series = series.iloc[:, 0]
+        series = series.dropna().sort_index()
+        months = to_month_code(series.index)
+        # Mantém a última observação de cada mês (séries mensais já chegam uma por mês)
+        keep = np.r_[months[1:] != months[:-1], True] if len(months) else np.array([], dtype=bool)
+        months = months[keep]
+        rates = series.to_numpy(dtype=float)[keep]
+        cumulative = np.concatenate(([1.0], np.cumprod(1.0 + rates / 100.0)))
+        return cls(months, cumulative)
+
+    def factor(self, start_months, end_months) -> np.ndarray:
+        """
+        Fator acumulado dos meses em [start, end) para arrays de códigos de mês.
+        Meses sem publicação (ainda não divulgados) simplesmente não entram no produto.
+        """
+        lo = np.searchsorted(self.months, np.asarray(start_months), side='left')
+        hi = np.searchsorted(self.months, np.asarray(end_months), side='left')
+        hi = np.maximum(hi, lo)
+        return self.cumulative[hi] / self.cumulative[lo]
+
+    def accumulated(self, months: int = 12, reference_date=None) -> float:
+        """Variação acumulada (%) dos últimos `months` meses publicados até a data de referência."""
+        end = self.months[-1] + 1 if reference_date is None else to_month_code([reference_date])[0] + 1
+        return float((self.factor([end - months], [end])[0] - 1.0) * 100.0)
+
+
+def normalize_index_name(name) -> str:
+    """Chave de comparação de nomes de índice: 'IGP-M', 'igpm' e 'Igp m' -> 'igpm'."""
+    return re.sub(r'[\s\-_./]', '', str(name)).casefold()
+
+
+def resolve_indices(df: pd.DataFrame, known, index_col: str = INDEX_COLUMN,
+                    default_index: str = 'IPCA') -> pd.Series:
+    """
+    Nome canônico (um de `known`) do índice de cada linha, comparando sem caixa, espaços
+    ou hífens. Linhas sem índice usam `default_index`; índices desconhecidos viram NaN.
+    """
+    canonical = {normalize_index_name(k): k for k in known}
+    if index_col not in df.columns:
+        return pd.Series(canonical.get(normalize_index_name(default_index)), index=df.index, dtype=object)
+    raw = df[index_col].astype(object)
+    names = raw.where(raw.notna() & (raw.astype(str).str.strip() != ''), default_index)
+    return names.map(lambda n: canonical.get(normalize_index_name(n))).astype(object)
+
+
+def readjust_portfolio(df: pd.DataFrame, tables: dict, reference_date=None,
+                       date_col: str = ANNIVERSARY_COLUMN, index_col: str = INDEX_COLUMN,
+                       default_index: str = 'IPCA', value_col: str = 'Valor') -> pd.DataFrame:
+    """
+    Reajusta o valor de todos os contratos de uma vez.
+    Cada linha usa o índice da coluna `index_col` (ou `default_index`) acumulado
+    do mês de aniversário até o mês anterior à data de referência; os nomes são comparados
+    com as chaves de `tables` via normalize_index_name ('ipca' = 'IPCA', 'IGPM' = 'IGP-M').
+    Retorna um DataFrame com 'Fator Reajuste' e 'Valor Reajustado' alinhado ao df.
+    Linhas cujo índice não está em `tables` ficam com NaN (não com fator 1).
+    """
+    if reference_date is None:
+        reference_date = pd.Timestamp.now()
+
+    start = to_month_code(df[date_col])
+    end = np.full(len(df), to_month_code([reference_date])[0], dtype=np.int64)
+    indices = resolve_indices(df, tables, index_col, default_index).to_numpy()
+
+    factor = np.full(len(df), np.nan)
+    for name, table in tables.items():
+        rows = indices == name
+        # Sem data-base válida não há período a reajustar: fator 1
+        factor[rows & (start < 0)] = 1.0
+        mask = rows & (start >= 0)
+        if mask.any():
+            factor[mask] = table.factor(start[mask], end[mask])
+
+    values = df[value_col].to_numpy(dtype=float)
+    return pd.DataFrame(
+        {'Fator Reajuste': factor, 'Valor Reajustado': np.round(values * factor, 2)},
+        index=df.index,
+    )
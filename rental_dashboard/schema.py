@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+import parsers
+
+# Colunas monetárias guardadas como int64 em centavos (totais exatos)
+MONEY_COLUMNS = ['Valor', 'Multa Est.', 'Juros Est.', 'Total Devido']
+# Textos de baixa cardinalidade guardados como categóricos
+CATEGORY_COLUMNS = ['Status', 'Inquilino', 'Imóvel']
+DATE_COLUMNS = ['Vencimento', 'Pago_em', 'Aniversario']
+STATUS_OPTIONS = ['Pago', 'Pendente', 'Atrasado']
+# Texto livre da visão do editor (buffers Arrow em vez de objetos Python)
+TEXT_DTYPE = 'string[pyarrow]'
+# Identificador da parcela na base local (coluna oculta no editor e fora dos relatórios)
+ID_COLUMN = 'ID'
+
+# Só vira categórico se houver no máximo 1 valor distinto a cada 2 linhas
+CATEGORY_MAX_RATIO = 0.5
+
+
+def to_centavos(values) -> np.ndarray:
+    """Reais (float) -> centavos (int64), arredondando ao centavo mais próximo; NaN vira 0."""
+    values = np.asarray(values, dtype=float)
+    return np.rint(np.nan_to_num(values) * 100.0).astype(np.int64)
+
+
+def to_reais(centavos):
+    """Centavos (int) -> reais (float). Aceita escalar ou array."""
+    if np.isscalar(centavos):
+        return centavos / 100.0
+    return np.asarray(centavos) / 100.0
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    return 'Valor' in df.columns and pd.api.types.is_integer_dtype(df['Valor'])
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica o esquema compacto na carga: dinheiro em centavos (int64), textos de baixa
+    cardinalidade como categóricos e datas como datetime64.
+    """
+    for col in MONEY_COLUMNS:
+        if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+            df[col] = to_centavos(df[col])
+
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = parsers.parse_dates(df[col])
+
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if df[col].nunique() <= CATEGORY_MAX_RATIO * len(df):
+            df[col] = df[col].astype('category')
+    if 'Status' in df.columns and isinstance(df['Status'].dtype, pd.CategoricalDtype):
+        # Garante as opções do editor entre as categorias
+        missing = [s for s in STATUS_OPTIONS if s not in df['Status'].cat.categories]
+        if missing:
+            df['Status'] = df['Status'].cat.add_categories(missing)
+    return df
+
+
+def display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cópia para exibição/edição: dinheiro em reais (float) e Inquilino/Imóvel como texto livre
+    (categóricos no editor limitariam os valores às categorias existentes). O texto fica em
+    string[pyarrow], bem menor que object; as demais colunas são compartilhadas com df.
+    """
+    view = df.copy(deep=False)
+    for col in MONEY_COLUMNS:
+        if col in view.columns and pd.api.types.is_integer_dtype(view[col]):
+            view[col] = to_reais(view[col].to_numpy())
+    for col in ('Inquilino', 'Imóvel'):
+        if col in view.columns and isinstance(view[col].dtype, pd.CategoricalDtype):
+            view[col] = view[col].astype(TEXT_DTYPE)
+    return view
@@ -0,0 +1,81 @@
+import pandas as pd
+
+import data_loader
+import financial_engine
+import pipeline
+from cube import AggregateCube
+
+TOP_OVERDUE_COLUMNS = ['Inquilino', 'Imóvel', 'Vencimento', 'Dias Atraso', 'Valor', 'Total Devido']
+
+
+class StreamingSummary:
+    """
+    Acumula os KPIs da carteira bloco a bloco, sem manter o arquivo inteiro em memória.
+    Só as `top_n` parcelas mais atrasadas ficam guardadas como linhas.
+    Valores monetários em centavos (esquema compacto).
+    """
+
+    def __init__(self, late_fee_percent: float = 10.0, monthly_interest_rate: float = 1.0,
+                 reference_date=None, top_n: int = 500):
+        self.late_fee_percent = late_fee_percent
+        self.monthly_interest_rate = monthly_interest_rate
+        self.reference_date = pd.Timestamp.now() if reference_date is None else pd.Timestamp(reference_date)
+        self.top_n = top_n
+
+        self.rows = 0
+        self.cube = AggregateCube()
+        self.top_overdue = pd.DataFrame(columns=TOP_OVERDUE_COLUMNS)
+
+    def update(self, chunk: pd.DataFrame):
+        """Normaliza, tipa e incorpora um bloco aos totais."""
+        chunk = pipeline.prepare_ledger(chunk)
+
+        arrears = financial_engine.calculate_arrears_batch(
+            chunk['Valor'], chunk['Vencimento'], chunk['Status'],
+            reference_date=self.reference_date,
+            late_fee_percent=self.late_fee_percent,
+            monthly_interest_rate=self.monthly_interest_rate,
+        )
+        chunk = chunk.assign(**{'Dias Atraso': arrears.days_late, 'Total Devido': arrears.total})
+
+        self.rows += len(chunk)
+        self.cube.add(chunk)
+        atrasados = chunk[chunk['Status'] == 'Atrasado']
+
+        if not atrasados.empty:
+            cols = [c for c in TOP_OVERDUE_COLUMNS if c in atrasados.columns]
+            candidates = atrasados[cols].nlargest(self.top_n, 'Dias Atraso')
+            merged = candidates if self.top_overdue.empty else pd.concat([self.top_overdue, candidates], ignore_index=True)
+            self.top_overdue = merged.nlargest(self.top_n, 'Dias Atraso').reset_index(drop=True)
+
+    @property
+    def total_recebido(self) -> int:
+        return self.cube.status_total('Pago')
+
+    @property
+    def total_pendente(self) -> int:
+        return self.cube.status_total('Pendente')
+
+    @property
+    def total_divida(self) -> int:
+        return self.cube.overdue_total
+
+    @property
+    def count_atrasados(self) -> int:
+        return self.cube.overdue_count
+
+
+def summarize_stream(uploaded_file, chunksize: int = 100_000, read_options: dict = None,
+                     **kwargs) -> StreamingSummary:
+    """
+    Processa o arquivo inteiro em modo streaming e devolve o resumo acumulado.
+    Aceita também uma lista de arquivos: os blocos de todos entram no mesmo resumo.
+    `read_options` mapeia rótulo do arquivo (pipeline.source_labels) -> aba e linha de cabeçalho (XLSX).
+    """
+    read_options = read_options or {}
+    summary = StreamingSummary(**kwargs)
+    files = uploaded_file if isinstance(uploaded_file, (list, tuple)) else [uploaded_file]
+    for file, label in zip(files, pipeline.source_labels(files)):
+        for chunk in data_loader.iter_data_chunks(file, chunksize=chunksize, **read_options.get(label, {})):
+            summary.update(chunk)
+    return summary
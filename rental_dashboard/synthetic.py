@@ -0,0 +1,137 @@
+"""
+Gerador de carteiras sintéticas realistas para benchmarks e testes manuais.
+
+Uso:
+    python synthetic.py 100000 -o carteira.csv [--formato csv|csv-latin1|xlsx] [--seed 0]
+
+As carteiras imitam as planilhas reais: dinheiro como texto pt-BR ('R$ 1.234,56'),
+datas em formatos misturados, cabeçalhos com sinônimos variados, CSV com ';'
+(UTF-8 ou latin1) e XLSX. Tudo é gerado a partir de pools pequenos de valores
+formatados uma única vez, então 10M de linhas saem em poucos segundos.
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+FORMATS = ['csv', 'csv-latin1', 'xlsx']
+# Limite de linhas de uma planilha do Excel (cabeçalho incluso)
+XLSX_MAX_ROWS = 1_048_575
+
+# Variações de cabeçalho reconhecidas por data_loader.resolve_column_mapping
+HEADER_VARIANTS = {
+    'Inquilino': ['Inquilino', 'Locatário', 'Nome do Cliente', 'Sacado'],
+    'Imóvel': ['Imóvel', 'Unidade', 'Apto', 'Endereço do Imóvel'],
+    'Vencimento': ['Vencimento', 'Data Vencimento', 'Dt_Venc', 'Competência'],
+    'Valor': ['Valor', 'Valor Aluguel', 'Mensalidade', 'Valor do Boleto'],
+    'Status': ['Status', 'Situação', 'Estado', 'Situação Pagamento'],
+    'Pago_em': ['Pago em', 'Data Pagamento', 'Quitado em', 'Data da Baixa'],
+}
+
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elena', 'Fábio', 'Gabriela', 'Heitor',
+               'Isabela', 'João', 'Karina', 'Luís', 'Marina', 'Nicolas', 'Otávio', 'Paula']
+LAST_NAMES = ['Souza', 'Lima', 'Dias', 'Silva', 'Rosa', 'Araújo', 'Conceição', 'Gonçalves',
+              'Pereira', 'Oliveira', 'Ribeiro', 'Brandão']
+PROPERTY_KINDS = ['Apt', 'Casa', 'Sala', 'Loja', 'Loft']
+BUILDINGS = ['Ed. Solar', 'Vila Verde', 'Business', 'Ed. Mar', 'Centro', 'Ed. São João', 'Jardim Paulista']
+
+# Proporções aproximadas de uma carteira real
+STATUS_WEIGHTS = {'Pago': 0.70, 'Pendente': 0.18, 'Atrasado': 0.12}
+# Formatos de data usados pelas planilhas (o primeiro é o predominante)
+DATE_STYLES = [('%d/%m/%Y', 0.85), ('%Y-%m-%d', 0.10), ('%d/%m/%y', 0.05)]
+
+
+def format_brl(centavos: int) -> str:
+    """Centavos -> 'R$ 1.234,56'."""
+    reais, cents = divmod(int(centavos), 100)
+    return f"R$ {reais:,}".replace(',', '.') + f",{cents:02d}"
+
+
+def _pick(rng, pool, n, p=None) -> np.ndarray:
+    """Sorteia n valores de um pool já formatado (o custo de formatação é só do pool)."""
+    pool = np.asarray(pool, dtype=object)
+    return pool[rng.choice(len(pool), size=n, p=p)]
+
+
+def generate_ledger(n_rows: int, seed: int = 0, headers: dict = None,
+                    start: str = '2023-01-01', months: int = 48) -> pd.DataFrame:
+    """
+    Carteira sintética com n_rows parcelas, todas as colunas como texto (como num CSV).
+    `headers` mapeia coluna canônica -> nome no arquivo; por padrão sorteia um sinônimo
+    de HEADER_VARIANTS para cada coluna.
+    """
+    rng = np.random.default_rng(seed)
+    if headers is None:
+        headers = {col: names[rng.integers(len(names))] for col, names in HEADER_VARIANTS.items()}
+
+    # Contratos: cada um tem inquilino, imóvel e aluguel fixos; as parcelas se repetem mês a mês
+    n_contracts = max(1, min(n_rows // 12, 200_000))
+    tenants = np.array([f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i:06d}"
+                        for i in range(n_contracts)], dtype=object)
+    properties = np.array([f"{PROPERTY_KINDS[i % len(PROPERTY_KINDS)]} {100 + i % 900} - {BUILDINGS[i % len(BUILDINGS)]}"
+                           for i in range(n_contracts)], dtype=object)
+    rents = rng.integers(60, 900, size=n_contracts) * 500   # R$ 300,00 a R$ 4.497,50
+    rent_labels, rent_codes = np.unique(rents, return_inverse=True)
+    rent_pool = np.array([format_brl(v) for v in rent_labels], dtype=object)
+
+    contract = rng.integers(n_contracts, size=n_rows)
+    month = rng.integers(months, size=n_rows)
+    due_days = pd.date_range(start, periods=months, freq='MS') + pd.Timedelta(days=4)
+
+    # Datas: cada mês formatado em todos os estilos; cada linha sorteia um estilo
+    styles = [fmt for fmt, _ in DATE_STYLES]
+    style = rng.choice(len(styles), size=n_rows, p=[w for _, w in DATE_STYLES])
+    due_pool = np.array([[d.strftime(fmt) for fmt in styles] for d in due_days], dtype=object)
+    due = due_pool[month, style]
+
+    status = _pick(rng, list(STATUS_WEIGHTS), n_rows, p=list(STATUS_WEIGHTS.values()))
+    paid = status == 'Pago'
+    pay_offset = rng.integers(-5, 15, size=n_rows)
+    paid_days = pd.date_range(due_days[0] - pd.Timedelta(days=5), due_days[-1] + pd.Timedelta(days=15), freq='D')
+    paid_pool = np.array(paid_days.strftime('%d/%m/%Y'), dtype=object)
+    paid_index = (due_days[month] - paid_days[0]).days.to_numpy() + pay_offset
+    paid_on = np.where(paid, paid_pool[paid_index], '')
+
+    df = pd.DataFrame({
+        'Inquilino': tenants[contract],
+        'Imóvel': properties[contract],
+        'Vencimento': due,
+        'Valor': rent_pool[rent_codes[contract]],
+        'Status': status,
+        'Pago_em': paid_on,
+    })
+    return df.rename(columns=headers)
+
+
+def write_ledger(df: pd.DataFrame, path, fmt: str = 'csv') -> Path:
+    """
+    Grava a carteira: 'csv' (UTF-8, ';'), 'csv-latin1' (cp1252/latin1, ';') ou 'xlsx'.
+    XLSX é truncado em XLSX_MAX_ROWS (limite do Excel).
+    """
+    path = Path(path)
+    if fmt == 'csv':
+        df.to_csv(path, sep=';', index=False, encoding='utf-8')
+    elif fmt == 'csv-latin1':
+        df.to_csv(path, sep=';', index=False, encoding='latin1')
+    elif fmt == 'xlsx':
+        df.iloc[:XLSX_MAX_ROWS].to_excel(path, index=False)
+    else:
+        raise ValueError(f"Formato desconhecido: {fmt} (use {', '.join(FORMATS)})")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera uma carteira de aluguel sintética.")
+    parser.add_argument('rows', type=int, help="Número de parcelas")
+    parser.add_argument('-o', '--output', type=Path, required=True, help="Arquivo de saída")
+    parser.add_argument('--formato', choices=FORMATS, default='csv')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_ledger(generate_ledger(args.rows, seed=args.seed), args.output, args.formato)
+    print(f"{args.rows} parcelas gravadas em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+# Os módulos do dashboard são importados pelo nome (import parsers), como no app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def make_upload():
+    """Arquivo enviado simulado: BytesIO com `.name`, como o UploadedFile do Streamlit."""
+    def make(content, name: str = 'carteira.csv', encoding: str = 'utf-8') -> io.BytesIO:
+        data = content.encode(encoding) if isinstance(content, str) else content
+        file = io.BytesIO(data)
+        file.name = name
+        return file
+    return make
@@ -0,0 +1,35 @@
+import pandas as pd
+
+import cli
+import pipeline
+
+CSV = "Inquilino,Imóvel,Vencimento,Valor,Status\n{tenant},Apt 1,2026-01-10,{value},Pago\n"
+
+
+def _write(folder, name, tenant, value):
+    (folder / name).write_text(CSV.format(tenant=tenant, value=value), encoding='utf-8')
+
+
+def test_total_row_is_summed_in_centavos(tmp_path):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    _write(entrada, 'a.csv', 'Ana', '0.10')
+    _write(entrada, 'b.csv', 'Bruno', '0.20')
+    summary = cli.run(entrada, tmp_path / 'saida', reference_date='2026-03-01', workers=1)
+    total = summary.iloc[-1]
+    assert total['Arquivo'] == 'TOTAL'
+    assert total['Receita Confirmada'] == 0.3
+    assert total['Parcelas'] == 2
+    written = pd.read_csv(tmp_path / 'saida' / cli.SUMMARY_FILE)
+    assert written['Receita Confirmada'].astype(str).tolist()[-1] == '0.3'
+
+
+def test_unexpected_error_is_reported_per_file(tmp_path, monkeypatch):
+    _write(tmp_path, 'a.csv', 'Ana', '100')
+
+    def broken(*args, **kwargs):
+        raise KeyError('Total Devido')
+
+    monkeypatch.setattr(pipeline, 'build_report', broken)
+    result = cli.process_file(tmp_path / 'a.csv', tmp_path, pd.Timestamp('2026-03-01'), 10.0, 1.0)
+    assert result == {'Arquivo': 'a.csv', 'Erro': "KeyError: 'Total Devido'"}
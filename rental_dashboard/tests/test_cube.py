@@ -0,0 +1,45 @@
+import pandas as pd
+
+import schema
+from cube import AggregateCube, period_label
+
+
+def _ledger():
+    return schema.compact(pd.DataFrame({
+        'Inquilino': ['Ana', 'Bruno', 'Carla', 'Diego'],
+        'Imóvel': ['Apt 101', 'Casa 22', 'Apt 101', None],
+        'Vencimento': pd.to_datetime(['2026-01-05', '2026-01-10', '2026-02-05', None]),
+        'Valor': [1500.0, 3000.0, 2200.0, 100.0],
+        'Status': ['Pago', 'Atrasado', 'Pendente', 'Pendente'],
+        'Total Devido': [1500.0, 3100.5, 2200.0, 100.0],
+    }))
+
+
+def test_period_label():
+    assert period_label(2026 * 12) == '2026-01'
+    assert period_label(2026 * 12 + 11) == '2026-12'
+
+
+def test_totals_are_exact_centavos():
+    cube = AggregateCube.from_frame(_ledger())
+    assert cube.status_totals() == {'Pago': 150000, 'Atrasado': 300000, 'Pendente': 230000}
+    assert cube.overdue_total == 310050
+    assert cube.overdue_count == 1
+    assert cube.count('Pendente') == 2
+
+
+def test_timeline_skips_rows_without_due_date():
+    timeline = AggregateCube.from_frame(_ledger()).timeline_frame()
+    assert timeline.values.tolist() == [['2026-01', 'Atrasado', 300000], ['2026-01', 'Pago', 150000],
+                                        ['2026-02', 'Pendente', 220000]]
+
+
+def test_removing_rows_matches_rebuild_and_drops_empty_cells():
+    df = _ledger()
+    cube = AggregateCube.from_frame(df, by_property=True)
+    cube.add(df.iloc[[1]], sign=-1)
+    rebuilt = AggregateCube.from_frame(df.drop(index=1), by_property=True)
+    assert cube.cells == rebuilt.cells
+    assert 'Atrasado' not in set(cube.status_frame()['Status'])
+    props = cube.property_frame()
+    assert props.loc[props['Imóvel'] == 'Apt 101', 'Parcelas'].sum() == 2
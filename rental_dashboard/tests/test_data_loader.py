@@ -0,0 +1,47 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+import data_loader
+import pipeline
+import readjustment
+
+
+@pytest.mark.parametrize('header', ['Aniversário', 'Data de Reajuste', 'Mês de Reajuste', 'Início do Contrato',
+                                    'Renewal Date'])
+def test_anniversary_headers_resolve(header):
+    headers = ('Inquilino', 'Vencimento', 'Valor', header, 'Índice de Reajuste')
+    mapping = dict(data_loader.resolve_column_mapping(headers))
+    assert mapping[header] == readjustment.ANNIVERSARY_COLUMN
+    assert mapping['Índice de Reajuste'] == readjustment.INDEX_COLUMN
+
+
+def test_anniversary_column_loaded_as_dates(make_upload):
+    file = make_upload("Inquilino;Vencimento;Valor;Data de Reajuste\n"
+                       "Ana;05/02/2026;1500,00;01/03/2024\n")
+    df = pipeline.load_ledger(file)
+    assert df[readjustment.ANNIVERSARY_COLUMN].tolist() == [pd.Timestamp('2024-03-01')]
+
+
+@pytest.mark.parametrize('header', ['Reajuste %', 'Valor Reajuste', 'Reajuste'])
+def test_numeric_readjustment_headers_are_not_anniversary(header):
+    headers = ('Inquilino', 'Vencimento', 'Valor', header)
+    mapping = dict(data_loader.resolve_column_mapping(headers))
+    assert mapping.get(header) != readjustment.ANNIVERSARY_COLUMN
+
+
+@pytest.mark.parametrize('headers, expected', [
+    (('Total Devido', 'Multa', 'Valor Aluguel', 'Data Vencimento', 'Nome', 'Situação'),
+     {'Valor Aluguel': 'Valor', 'Data Vencimento': 'Vencimento', 'Nome': 'Inquilino', 'Situação': 'Status'}),
+    (('Total Devido', 'Multa', 'Vencimento', 'Locatário'),
+     {'Total Devido': 'Valor', 'Locatário': 'Inquilino'}),
+    (('Valor', 'Total Devido', 'Data', 'Data Pagamento', 'Cliente', 'Unidade'),
+     {'Data': 'Vencimento', 'Data Pagamento': 'Pago_em', 'Cliente': 'Inquilino', 'Unidade': 'Imóvel'}),
+])
+def test_mapping_does_not_depend_on_column_order(monkeypatch, headers, expected):
+    monkeypatch.setattr(data_loader, 'load_layout_profiles', lambda: {})
+    data_loader.resolve_column_mapping.cache_clear()
+    for order in itertools.permutations(headers):
+        assert dict(data_loader.resolve_column_mapping(order)) == expected
+    data_loader.resolve_column_mapping.cache_clear()
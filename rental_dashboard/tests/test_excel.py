@@ -0,0 +1,62 @@
+import io
+
+import pandas as pd
+import pytest
+
+import data_loader
+import pipeline
+import upload_cache
+
+LEDGER = pd.DataFrame({
+    'Inquilino': ['Ana', 'Bruno', 'Carla'],
+    'Vencimento': ['05/02/2026', '10/02/2026', '12/02/2026'],
+    'Valor': [1500.0, 3000.0, 2200.0],
+})
+
+
+@pytest.fixture
+def workbook(make_upload):
+    """Pasta com uma aba de capa e a carteira na segunda aba, cabeçalho na 3ª linha."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        pd.DataFrame({'Capa': ['Relatório']}).to_excel(writer, sheet_name='Capa', index=False)
+        pd.DataFrame([['Carteira de aluguéis'], [None]]).to_excel(writer, sheet_name='Carteira', index=False,
+                                                                  header=False)
+        LEDGER.to_excel(writer, sheet_name='Carteira', index=False, startrow=2)
+    return make_upload(buffer.getvalue(), 'carteira.xlsx')
+
+
+def test_list_sheets(workbook):
+    assert data_loader.list_sheets(workbook) == ['Capa', 'Carteira']
+
+
+@pytest.mark.parametrize('sheet', ['Carteira', 1])
+def test_load_selected_sheet_and_header_row(workbook, sheet):
+    df = pipeline.load_ledger(workbook, sheet_name=sheet, header_row=2)
+    assert df['Inquilino'].astype(str).tolist() == ['Ana', 'Bruno', 'Carla']
+    assert df['Valor'].tolist() == [150000, 300000, 220000]
+    assert df.attrs['excel_sheet']['header_row'] == 2
+
+
+def test_default_sheet_lacks_ledger_columns(workbook):
+    with pytest.raises(data_loader.DataLoadError):
+        pipeline.load_ledger(workbook)
+
+
+def test_streamed_chunks_match_full_read(workbook):
+    chunks = list(data_loader.iter_data_chunks(workbook, chunksize=2, sheet_name='Carteira', header_row=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    streamed = pd.concat(chunks, ignore_index=True)
+    full = data_loader.load_data(workbook, sheet_name='Carteira', header_row=2)
+    assert streamed.astype(str).values.tolist() == full.astype(str).values.tolist()
+
+
+def test_unknown_sheet_is_a_load_error(workbook):
+    with pytest.raises(data_loader.DataLoadError):
+        data_loader.load_data(workbook, sheet_name='Nope')
+
+
+def test_each_reading_of_a_workbook_has_its_own_cache_key(workbook):
+    digest = upload_cache.file_digest(workbook)
+    keys = {upload_cache.variant_key(digest, sheet_name=s, header_row=h) for s in ('Capa', 'Carteira') for h in (0, 2)}
+    assert len(keys) == 4
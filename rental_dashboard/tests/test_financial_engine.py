@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import financial_engine as fe
+import schema
+
+
+@pytest.fixture(params=['numpy_financial', 'formulas'])
+def backend(request, monkeypatch):
+    """Roda cada teste com numpy_financial (se instalado) e com as fórmulas fechadas."""
+    if request.param == 'numpy_financial':
+        if fe._numpy_financial() is None:
+            pytest.skip("numpy_financial não instalado")
+    else:
+        monkeypatch.setattr(fe, '_numpy_financial', lambda: None)
+    return request.param
+
+
+def test_pmt_price_and_zero_rate(backend):
+    assert fe.pmt(0.01, 12, 10_000) == pytest.approx(-888.4878867834164)
+    assert fe.pmt(0.0, 10, 1_000) == pytest.approx(-100.0)
+    grid = fe.pmt(np.array([0.0, 0.01]), 12, 1_200)
+    assert grid == pytest.approx([-100.0, -106.6185464140])
+
+
+def test_ipmt_plus_ppmt_is_the_payment(backend):
+    per = np.arange(1, 13)
+    interest = fe.ipmt(0.01, per, 12, 10_000)
+    principal = fe.ppmt(0.01, per, 12, 10_000)
+    assert interest[0] == pytest.approx(-100.0)
+    assert interest + principal == pytest.approx(np.full(12, fe.pmt(0.01, 12, 10_000)))
+    assert -principal.sum() == pytest.approx(10_000)
+
+
+def test_irr_recovers_rate_and_handles_no_solution(backend):
+    flows = np.concatenate(([-10_000.0], np.full(12, 888.4878867834164)))
+    assert fe.irr(flows) == pytest.approx(0.01)
+    assert fe.npv(0.01, flows) == pytest.approx(0.0, abs=1e-6)
+    assert fe.irr(np.vstack([flows, flows])) == pytest.approx([0.01, 0.01])
+    assert np.isnan(fe.irr([100.0, 100.0]))
+
+
+@pytest.mark.parametrize('system', ['price', 'sac'])
+def test_amortization_schedule_closes_the_balance(backend, system):
+    table = fe.amortization_schedule(0.01, 12, 12_000, system=system)
+    assert len(table) == 12
+    assert table['Amortização'].sum() == pytest.approx(12_000)
+    assert table['Saldo Devedor'].iloc[-1] == pytest.approx(0.0, abs=1e-6)
+    assert table['Juros'].iloc[0] == pytest.approx(120.0)
+    assert table['Prestação'].tolist() == pytest.approx((table['Juros'] + table['Amortização']).tolist())
+    if system == 'sac':
+        assert table['Amortização'].tolist() == pytest.approx([1_000.0] * 12)
+    else:
+        assert table['Prestação'].tolist() == pytest.approx([-fe.pmt(0.01, 12, 12_000)] * 12)
+
+
+def test_amortization_unknown_system():
+    with pytest.raises(ValueError):
+        fe.amortization_schedule(0.01, 12, 1_000, system='sam')
+
+
+def test_financial_calculator_targets(backend):
+    assert fe.financial_calculator(0.01, 12, 10_000, 'ipmt', per=1) == pytest.approx(-100.0)
+    with pytest.raises(ValueError):
+        fe.financial_calculator(0.01, 12, 10_000, 'fv')
+
+
+def _arrears_row_by_row(values, due_dates, statuses, reference_date, late_fee_percent, monthly_interest_rate):
+    """Regra original do app, linha a linha (referência para a versão em lote)."""
+    rows = []
+    for value, due, status in zip(values, due_dates, statuses):
+        days = (reference_date - due).days if pd.notna(due) else np.nan
+        days = max(0, days) if status != 'Pago' else 0
+        days = 0 if pd.isna(days) else days
+        fee = fe.calculate_late_fee(value, late_fee_percent) if days > 0 else 0
+        interest = fe.calculate_interest(value, days, monthly_interest_rate) if days > 0 else 0
+        rows.append((days, fee, interest, value + fee + interest))
+    return [list(col) for col in zip(*rows)]
+
+
+def test_arrears_batch_matches_row_by_row():
+    reference = pd.Timestamp('2026-03-10')
+    values = [1000.0, 1000.0, 2500.55, np.nan, 800.0, 1234.56, 300.0, 999.99]
+    due_dates = pd.to_datetime(['2026-03-10', '2026-03-09', '2026-01-15', '2026-02-01',
+                                None, '2025-12-31', '2026-04-01', '2026-02-20'])
+    statuses = ['Atrasado', 'Atrasado', 'Pendente', 'Atrasado', 'Atrasado', 'Pago', 'Pendente', None]
+    batch = fe.calculate_arrears_batch(values, due_dates, statuses, reference_date=reference,
+                                       late_fee_percent=2.0, monthly_interest_rate=1.0)
+    expected = _arrears_row_by_row(values, due_dates, statuses, reference, 2.0, 1.0)
+    assert batch.days_late.tolist() == [0, 1, 54, 37, 0, 0, 0, 18]
+    for got, want in zip(batch, expected):
+        np.testing.assert_array_equal(got, np.asarray(want, dtype=float))
+
+
+def test_arrears_batch_in_centavos_rounds_row_by_row_result():
+    reference = pd.Timestamp('2026-03-10')
+    reais = [1000.0, 2500.55, 1234.56]
+    due_dates = pd.to_datetime(['2026-03-09', '2026-01-15', '2025-12-31'])
+    statuses = ['Atrasado', 'Pendente', 'Atrasado']
+    batch = fe.calculate_arrears_batch(schema.to_centavos(reais), due_dates, statuses, reference_date=reference)
+    _, fees, interests, _ = _arrears_row_by_row(reais, due_dates, statuses, reference, 10.0, 1.0)
+    assert batch.late_fee.tolist() == [round(f * 100) for f in fees]
+    assert batch.interest.tolist() == [round(i * 100) for i in interests]
+    assert batch.total.tolist() == (schema.to_centavos(reais) + batch.late_fee + batch.interest).tolist()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+import schema
+from incremental import IncrementalLedger
+
+REFERENCE = pd.Timestamp('2026-03-01')
+
+
+def _source():
+    return schema.compact(pd.DataFrame({
+        'Inquilino': ['Ana', 'Bruno', 'Ana', 'Bruno', 'Ana', 'Bruno'],
+        'Imóvel': ['Apt 101', 'Casa 22', 'Apt 101', 'Casa 22', 'Apt 101', 'Casa 22'],
+        'Vencimento': pd.to_datetime(['2026-01-05', '2026-01-10', '2026-02-05',
+                                      '2026-02-10', '2026-03-05', None]),
+        'Valor': [1500.0, 3000.0, 1500.0, 3000.0, 1500.0, 3000.0],
+        'Status': ['Pago', 'Atrasado', 'Atrasado', 'Pendente', 'Pendente', 'Atrasado'],
+    }))
+
+
+def test_view_keeps_text_compact_and_base_shares_source_columns():
+    source = _source()
+    ledger = IncrementalLedger(source, reference_date=REFERENCE)
+    assert isinstance(ledger.base['Inquilino'].dtype, pd.CategoricalDtype)
+    assert ledger.view['Inquilino'].dtype == schema.TEXT_DTYPE
+    assert ledger.view['Imóvel'].dtype == schema.TEXT_DTYPE
+    assert ledger.view['Valor'].tolist() == [1500.0, 3000.0, 1500.0, 3000.0, 1500.0, 3000.0]
+    assert np.shares_memory(ledger.base['Valor'].to_numpy(), source['Valor'].to_numpy())
+    assert 'Total Devido' not in source.columns
+
+
+DELTA = {
+    'edited_rows': {0: {'Status': 'Atrasado'}, 3: {'Valor': 3100.5, 'Vencimento': '2026-01-20'},
+                    4: {'Inquilino': 'Carla'}},
+    'deleted_rows': [1],
+    'added_rows': [{'Inquilino': 'Diego', 'Imóvel': 'Loja 3', 'Vencimento': '2026-02-01',
+                    'Valor': 900.0, 'Status': 'Atrasado'}],
+}
+
+
+def _edited_source():
+    """A carteira com DELTA aplicado diretamente (referência para o recálculo completo)."""
+    df = schema.display_frame(_source())
+    df['Inquilino'] = df['Inquilino'].astype(object)
+    df.loc[0, 'Status'] = 'Atrasado'
+    df.loc[3, 'Valor'] = 3100.5
+    df.loc[3, 'Vencimento'] = pd.Timestamp('2026-01-20')
+    df.loc[4, 'Inquilino'] = 'Carla'
+    df = df.drop(index=1)
+    added = pd.DataFrame(DELTA['added_rows']).assign(Vencimento=lambda d: pd.to_datetime(d['Vencimento']))
+    return schema.compact(pd.concat([df, added], ignore_index=True))
+
+
+def _editor_return(ledger):
+    """O que o st.data_editor devolve para DELTA (derivadas ainda desatualizadas)."""
+    view = ledger.view.copy()
+    view['Inquilino'] = view['Inquilino'].astype(object)
+    view.loc[0, 'Status'] = 'Atrasado'
+    view.loc[3, 'Valor'] = 3100.5
+    view.loc[3, 'Vencimento'] = pd.Timestamp('2026-01-20')
+    view.loc[4, 'Inquilino'] = 'Carla'
+    # Como o editor: linhas novas recebem os próximos rótulos e só depois as excluídas saem
+    added = pd.DataFrame(DELTA['added_rows'], index=[len(view)])
+    return pd.concat([view, added]).drop(index=1)
+
+
+def test_delta_matches_full_recompute():
+    ledger = IncrementalLedger(_source(), reference_date=REFERENCE)
+    ledger.apply_delta(DELTA)
+    full = IncrementalLedger(_edited_source(), reference_date=REFERENCE)
+
+    assert ledger.aggregates.status_totals() == full.aggregates.status_totals()
+    assert ledger.aggregates.overdue_total == full.aggregates.overdue_total
+    assert ledger.aggregates.overdue_count == full.aggregates.overdue_count
+    assert ledger.aggregates.timeline_frame().values.tolist() == full.aggregates.timeline_frame().values.tolist()
+    overdue = ledger.overdue_frame().sort_values(['Inquilino', 'Vencimento'])
+    expected = full.base[full.base['Status'] == 'Atrasado'].sort_values(['Inquilino', 'Vencimento'])
+    assert overdue['Total Devido'].tolist() == expected['Total Devido'].tolist()
+
+    patched = ledger.patch_derived(_editor_return(ledger))
+    assert patched['Total Devido'].tolist() == full.view['Total Devido'].tolist()
+    assert patched['Dias Atraso'].tolist() == full.view['Dias Atraso'].tolist()
+
+
+def test_reverting_the_delta_restores_the_original_totals():
+    ledger = IncrementalLedger(_source(), reference_date=REFERENCE)
+    original = ledger.aggregates.status_totals(), ledger.aggregates.overdue_total
+    ledger.apply_delta(DELTA)
+    changes = ledger.apply_delta({})
+    assert (ledger.aggregates.status_totals(), ledger.aggregates.overdue_total) == original
+    # Linhas restauradas voltam como atualizadas; a adicionada deixa de valer
+    assert changes.updated.index.tolist() == [0, 1, 3, 4]
+    assert changes.previous_added['Inquilino'].tolist() == ['Diego']
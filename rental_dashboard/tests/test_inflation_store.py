@@ -0,0 +1,113 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+import inflation_store
+
+# Série mensal canônica servida pelo SGS local (IPCA, % a.m.)
+IPCA = {pd.Timestamp(2025, m, 1): 0.1 * m for m in range(1, 13)}
+
+
+class _SGSHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        start = pd.to_datetime(query['dataInicial'][0], format='%d/%m/%Y')
+        end = pd.to_datetime(query['dataFinal'][0], format='%d/%m/%Y')
+        self.requests.append((url.path, start, end))
+        rows = [{'data': d.strftime('%d/%m/%Y'), 'valor': f'{v:.2f}'}
+                for d, v in IPCA.items() if start <= d <= end]
+        body = json.dumps(rows).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sgs_server():
+    _SGSHandler.requests = []
+    server = HTTPServer(('127.0.0.1', 0), _SGSHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_incremental_sync_and_offline_fallback(tmp_path, sgs_server):
+    base_url = f"http://127.0.0.1:{sgs_server.server_port}"
+    store = inflation_store.InflationStore(tmp_path / 'inflation.sqlite',
+                                           fetcher=inflation_store.make_http_fetcher(base_url, timeout=5))
+
+    first = store.get('IPCA', '2025-06-01', '2025-12-01')
+    assert first['IPCA'].round(2).tolist() == [0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2]
+    assert _SGSHandler.requests[0][0] == '/bcdata.sgs.433/dados'
+
+    # Intervalo já coberto: servido do disco, sem nova consulta
+    store.get('IPCA', '2025-07-01', '2025-12-01')
+    assert len(_SGSHandler.requests) == 1
+
+    # Início mais antigo: busca só os meses que faltam
+    wider = store.get('IPCA', '2025-03-01', '2025-12-01')
+    assert len(wider) == 10
+    assert len(_SGSHandler.requests) == 2
+    _, start, end = _SGSHandler.requests[1]
+    assert (start, end) == (pd.Timestamp('2025-03-01'), pd.Timestamp('2025-05-31'))
+
+    # Sem rede: o mesmo período continua disponível pelo snapshot local
+    sgs_server.shutdown()
+    sgs_server.server_close()
+    offline = inflation_store.InflationStore(tmp_path / 'inflation.sqlite',
+                                             fetcher=inflation_store.make_http_fetcher(base_url, timeout=1))
+    snapshot = offline.get('IPCA', '2025-01-01', '2025-12-01')
+    assert snapshot['IPCA'].round(2).tolist() == [0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2]
+
+
+class _FakeSGS:
+    """Fetcher em memória: série publicada de 2020-01 a 2024-06 e registro das consultas."""
+
+    def __init__(self):
+        self.series = pd.Series(0.5, index=pd.date_range('2020-01-01', '2024-06-01', freq='MS'))
+        self.calls = []
+
+    def __call__(self, code, start, end):
+        self.calls.append((start, end))
+        return self.series[(self.series.index >= start) & (self.series.index <= end)]
+
+
+def test_gap_between_separate_fetches_is_filled(tmp_path, monkeypatch):
+    fetcher = _FakeSGS()
+    store = inflation_store.InflationStore(tmp_path / 'inflation.sqlite', fetcher=fetcher)
+    monkeypatch.setattr(inflation_store, 'REFRESH_INTERVAL', timedelta(0))
+
+    assert len(store.get('IPCA', '2021-01-01', '2021-12-01')) == 12
+    assert len(store.get('IPCA', '2023-01-01', '2023-12-01')) == 12
+    full = store.get('IPCA', '2021-01-01', '2023-12-01')
+    assert len(full) == 36
+    assert fetcher.calls[-1][0] == pd.Timestamp('2022-01-01')
+    assert fetcher.calls[-1][1].to_period('M') == pd.Period('2022-12')
+
+
+def test_unpublished_tail_is_throttled_but_gaps_are_not(tmp_path):
+    fetcher = _FakeSGS()
+    store = inflation_store.InflationStore(tmp_path / 'inflation.sqlite', fetcher=fetcher)
+    store.get('IPCA', '2024-01-01', '2024-12-01')
+    calls = len(fetcher.calls)
+    # Meses ainda não publicados (2024-07 em diante): sem nova consulta dentro do intervalo
+    assert len(store.get('IPCA', '2024-01-01', '2024-12-01')) == 6
+    assert len(fetcher.calls) == calls
+    # Lacuna anterior ao último mês publicado: buscada mesmo dentro do intervalo
+    assert len(store.get('IPCA', '2023-07-01', '2024-12-01')) == 12
+    assert len(fetcher.calls) == calls + 1
@@ -0,0 +1,51 @@
+import pandas as pd
+
+import exports
+import ledger_store
+import schema
+
+
+def _ledger():
+    return schema.compact(pd.DataFrame({
+        'Inquilino': ['Ana', 'Bruno', 'Carla'],
+        'Imóvel': ['Apt 101', 'Casa 22', 'Sala 404'],
+        'Vencimento': pd.to_datetime(['2026-01-05', None, '2026-02-05']),
+        'Valor': [1500.0, 3000.0, 2200.0],
+        'Status': ['Pago', 'Pendente', 'Atrasado'],
+    }))
+
+
+def test_reupload_without_due_date_does_not_duplicate(tmp_path):
+    store = ledger_store.LedgerStore(tmp_path / 'ledger.sqlite')
+    assert store.upsert(_ledger()) == (3, 0)
+    assert store.upsert(_ledger()) == (0, 3)
+    assert store.count() == 3
+
+
+def test_query_period_and_export_without_id(tmp_path):
+    store = ledger_store.LedgerStore(tmp_path / 'ledger.sqlite')
+    store.upsert(_ledger())
+    assert store.bounds() == (pd.Timestamp('2026-01-05'), pd.Timestamp('2026-02-05'))
+    january = store.query('2026-01-01', '2026-01-31', undated=False)
+    assert january['Inquilino'].tolist() == ['Ana']
+    header = exports.serialize(january, 'CSV').decode('utf-8').splitlines()[0]
+    assert schema.ID_COLUMN not in header.split(',')
+
+
+def test_rows_without_due_date_are_queried_explicitly(tmp_path):
+    store = ledger_store.LedgerStore(tmp_path / 'ledger.sqlite')
+    store.upsert(_ledger())
+    assert store.count_undated() == 1
+    january = store.query('2026-01-01', '2026-01-31')
+    assert january['Inquilino'].tolist() == ['Bruno', 'Ana']
+    assert january['Vencimento'].isna().tolist() == [True, False]
+    assert store.query('2026-01-01', '2026-01-31', undated=False)['Inquilino'].tolist() == ['Ana']
+    assert len(store.query()) == 3
+
+
+def test_period_query_uses_due_date_status_index(tmp_path):
+    store = ledger_store.LedgerStore(tmp_path / 'ledger.sqlite')
+    with store._connect() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM parcelas"
+                            " WHERE vencimento >= '2026-01-01' AND status = 'Atrasado'").fetchall()
+    assert 'idx_parcelas_vencimento_status' in ' '.join(str(row) for row in plan)
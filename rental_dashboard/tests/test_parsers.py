@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import parsers
+import pipeline
+
+
+@pytest.mark.parametrize('values', [
+    pd.Series([None, None], dtype=object),
+    pd.Series([np.nan, np.nan]),
+    pd.Series([], dtype=object),
+])
+def test_parse_dates_all_null(values):
+    result = parsers.parse_dates(values)
+    assert result.dtype == 'datetime64[ns]'
+    assert len(result) == len(values)
+    assert result.isna().all()
+
+
+def test_parse_dates_mixed_formats_and_nulls():
+    values = pd.Series(['05/02/2026', None, '2026-03-10', 'abc'])
+    result = parsers.parse_dates(values)
+    assert result.tolist()[0] == pd.Timestamp('2026-02-05')
+    assert result.tolist()[2] == pd.Timestamp('2026-03-10')
+    assert result.isna().tolist() == [False, True, False, True]
+
+
+def test_load_ledger_with_blank_paid_column(make_upload):
+    file = make_upload("Inquilino;Imovel;Vencimento;Valor;Status;Pago em\n"
+                       "Ana;Apt 101;05/02/2026;1500,00;Pendente;\n"
+                       "Bruno;Casa 22;10/02/2026;3000,00;Pendente;\n")
+    df = pipeline.load_ledger(file)
+    assert len(df) == 2
+    assert df['Pago_em'].isna().all()
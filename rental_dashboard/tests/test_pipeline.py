@@ -0,0 +1,55 @@
+import io
+
+import pandas as pd
+
+import diagnostics
+import pipeline
+
+
+def test_load_ledgers_stages_reach_current_recording(make_upload):
+    files = [make_upload(f"Inquilino;Vencimento;Valor\n{tenant};05/02/2026;1500,00\n", name)
+             for name, tenant in (('a.csv', 'Ana'), ('b.csv', 'Bruno'))]
+    with diagnostics.recording() as run:
+        frames, errors = pipeline.load_ledgers(files)
+    assert errors == {}
+    assert [len(df) for df in frames] == [1, 1]
+    stages = [r.stage for r in run.records]
+    for name in ('load_data', 'smart_normalize_columns', 'coerce_types', 'compact'):
+        assert stages.count(name) == 2
+
+
+def _workbook(make_upload, df, startrow=0):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, startrow=startrow)
+    return make_upload(buffer.getvalue(), 'carteira.xlsx')
+
+
+def test_files_with_the_same_name_keep_their_own_options_errors_and_source(make_upload):
+    ledger = pd.DataFrame({'Inquilino': ['Ana'], 'Vencimento': ['05/02/2026'], 'Valor': [1500.0]})
+    files = [_workbook(make_upload, ledger),
+             _workbook(make_upload, ledger.assign(Inquilino='Bruno'), startrow=2),
+             _workbook(make_upload, pd.DataFrame({'Sem colunas': [1]}))]
+    labels = pipeline.source_labels(files)
+    assert labels == ['carteira.xlsx', 'carteira.xlsx (2)', 'carteira.xlsx (3)']
+    frames, errors = pipeline.load_ledgers(files, read_options={'carteira.xlsx (2)': {'header_row': 2}})
+    assert list(errors) == ['carteira.xlsx (3)']
+    merged = pipeline.merge_ledgers([(label, df) for label, df in zip(labels, frames) if df is not None])
+    assert merged['Inquilino'].tolist() == ['Ana', 'Bruno']
+    assert merged[pipeline.SOURCE_COLUMN].tolist() == ['carteira.xlsx', 'carteira.xlsx (2)']
+
+
+def test_configure_logging_emits_stage_lines_once():
+    stream = io.StringIO()
+    diagnostics.configure_logging(stream=stream)
+    diagnostics.configure_logging(stream=stream)
+    try:
+        with diagnostics.stage('teste', rows=3):
+            pass
+    finally:
+        for handler in list(diagnostics.logger.handlers):
+            if getattr(handler, '_diagnostics', False):
+                diagnostics.logger.removeHandler(handler)
+        diagnostics.logger.propagate = True
+    lines = [line for line in stream.getvalue().splitlines() if '"event"' in line]
+    assert len(lines) == 1
+    assert '"stage": "teste"' in lines[0]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ranking
+import schema
+
+
+def test_top_n_positions_matches_stable_sort():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, size=500).astype(float)
+    values[::37] = np.nan
+    expected = np.lexsort((np.arange(len(values)), -np.nan_to_num(values, nan=-np.inf)))
+    for n in (0, 1, 10, 57, 500, 900):
+        assert ranking.top_n_positions(values, n).tolist() == expected[:n].tolist()
+
+
+def test_top_n_positions_ties_keep_original_order():
+    assert ranking.top_n_positions([5, 9, 5, 9, 1], 3).tolist() == [1, 3, 0]
+
+
+def _overdue():
+    return schema.compact(pd.DataFrame({
+        'Inquilino': ['Ana', 'Bruno', 'Ana', 'Carla', 'Bruno'],
+        'Imóvel': ['Apt 101', 'Casa 22', 'Apt 101', 'Sala 4', 'Casa 23'],
+        'Vencimento': pd.to_datetime(['2026-01-05'] * 5),
+        'Valor': [1000.0, 2000.0, 1000.0, 500.0, 300.0],
+        'Status': ['Atrasado'] * 5,
+        'Dias Atraso': [30, 10, 60, 90, 5],
+        'Total Devido': [1100.0, 2050.0, 1200.0, 600.0, 310.0],
+    }))
+
+
+def test_pages_cover_the_full_ranking():
+    ranked = ranking.OverdueRanking(_overdue(), key='Dias Atraso', page_size=2)
+    assert ranked.pages == 3
+    days = [d for p in (1, 2, 3) for d in ranked.page(p)['Dias Atraso']]
+    assert days == [90, 60, 30, 10, 5]
+    assert ranked.page(99)['Dias Atraso'].tolist() == [5]
+
+
+def test_group_by_tenant_sums_debt():
+    ranked = ranking.OverdueRanking(_overdue(), key='Total Devido', group_by='Inquilino')
+    top = ranked.top(3)
+    assert top['Inquilino'].astype(str).tolist() == ['Bruno', 'Ana', 'Carla']
+    assert top['Total Devido'].tolist() == [236000, 230000, 60000]
+    assert top['Parcelas'].tolist() == [2, 2, 1]
+    assert top['Dias Atraso'].tolist() == [10, 60, 90]
+
+
+def test_unknown_key():
+    with pytest.raises(ValueError):
+        ranking.OverdueRanking(_overdue(), key='Valor')
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import readjustment
+
+
+def _table(rate: float):
+    months = pd.date_range('2024-01-01', '2025-12-01', freq='MS')
+    return readjustment.IndexTable.from_series(pd.Series(rate, index=months))
+
+
+def test_index_names_are_normalized_and_unknown_rows_are_nan():
+    df = pd.DataFrame({
+        'Valor': [1000.0, 1000.0, 1000.0, 1000.0, 1000.0],
+        'Aniversario': pd.to_datetime(['2025-01-01'] * 4 + [None]),
+        'Indice': ['IPCA', 'ipca', 'igpm', 'INCC', None],
+    })
+    tables = {'IPCA': _table(1.0), 'IGP-M': _table(0.5)}
+    reaj = readjustment.readjust_portfolio(df, tables, reference_date='2025-07-15')
+    factors = reaj['Fator Reajuste'].to_numpy()
+    assert factors[0] == pytest.approx(1.01 ** 6)
+    assert factors[1] == factors[0]
+    assert factors[2] == pytest.approx(1.005 ** 6)
+    assert np.isnan(factors[3])
+    # Sem índice: usa o padrão; sem data-base: fator 1
+    assert factors[4] == 1.0
+    assert np.isnan(reaj['Valor Reajustado'].iloc[3])
+
+
+def test_resolve_indices_uses_default_for_blank():
+    df = pd.DataFrame({'Indice': ['IGP-M', '', None, 'xyz']})
+    resolved = readjustment.resolve_indices(df, ['IPCA', 'IGP-M'], default_index='ipca')
+    assert resolved.tolist()[:3] == ['IGP-M', 'IPCA', 'IPCA']
+    assert pd.isna(resolved.iloc[3])
@@ -0,0 +1,18 @@
+import pipeline
+import streaming
+
+
+def _cp1252_csv(make_upload, rows: int):
+    lines = ["Inquilino;Imovel;Vencimento;Valor;Status;Pago em"]
+    lines += [f"Inquilino {i};Apt {i};05/02/2026;1500,00;Pago;03/02/2026" for i in range(rows)]
+    # Único caractere não ASCII bem depois da amostra usada na detecção do encoding
+    lines.append("José;Apt X;05/02/2026;1500,00;Atrasado;")
+    return make_upload("\n".join(lines) + "\n", encoding='cp1252')
+
+
+def test_stream_falls_back_to_latin1_like_full_load(make_upload):
+    file = _cp1252_csv(make_upload, 3000)
+    full = pipeline.load_ledger(file)
+    summary = streaming.summarize_stream(file, chunksize=1000)
+    assert summary.rows == len(full) == 3001
+    assert summary.count_atrasados == 1
@@ -0,0 +1,42 @@
+import threading
+
+import pandas as pd
+
+import upload_cache
+
+
+def test_variant_key_depends_on_options_and_pipeline_version(monkeypatch):
+    base = upload_cache.variant_key('abc')
+    assert upload_cache.variant_key('abc') == base
+    assert upload_cache.variant_key('abc', sheet_name='Dados', header_row=2) != base
+    monkeypatch.setattr(upload_cache, 'pipeline_version', lambda: 'outra-versao')
+    assert upload_cache.variant_key('abc') != base
+
+
+def test_disk_round_trip_and_concurrent_access(tmp_path):
+    cache = upload_cache.UploadCache(max_entries=2, disk_dir=tmp_path, max_disk_entries=3)
+    frames = {f'k{i}': pd.DataFrame({'Valor': [i]}) for i in range(8)}
+
+    def worker(keys):
+        for key in keys:
+            cache.put(key, frames[key])
+            cache.get(key)
+
+    threads = [threading.Thread(target=worker, args=(list(frames),)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(list(tmp_path.glob('*.parquet'))) <= 3
+    assert not list(tmp_path.glob('*.tmp'))
+    fresh = upload_cache.UploadCache(disk_dir=tmp_path)
+    assert fresh.get('k7')['Valor'].tolist() == [7]
+
+
+def test_disk_cache_is_off_unless_configured(monkeypatch, tmp_path):
+    monkeypatch.delenv(upload_cache.DISK_CACHE_ENV, raising=False)
+    assert upload_cache.disk_cache_dir() is None
+    assert upload_cache.UploadCache(disk_dir=upload_cache.disk_cache_dir()).disk_dir is None
+    monkeypatch.setenv(upload_cache.DISK_CACHE_ENV, str(tmp_path / 'uploads'))
+    assert upload_cache.UploadCache(disk_dir=upload_cache.disk_cache_dir()).disk_dir == tmp_path / 'uploads'
+    assert (tmp_path / 'uploads').is_dir()
@@ -0,0 +1,138 @@
+import functools
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Cópia em Parquet das planilhas enviadas: desligada por padrão (os dados dos inquilinos
+# ficariam gravados no servidor). Para ligar, aponte a variável para uma pasta, ex.:
+#   RENTAL_UPLOAD_CACHE_DIR=.data/uploads streamlit run app.py   (.data/ fica fora do git)
+DISK_CACHE_ENV = 'RENTAL_UPLOAD_CACHE_DIR'
+# Módulos que definem o DataFrame gerado a partir do arquivo: o hash do código entra na
+# chave, então qualquer mudança de parsing invalida o cache (inclusive o Parquet em disco)
+PIPELINE_MODULES = ['data_loader.py', 'parsers.py', 'schema.py', 'pipeline.py']
+
+
+def file_digest(uploaded_file) -> str:
+    """Hash SHA-256 do conteúdo do arquivo enviado (identifica o upload entre reruns)."""
+    uploaded_file.seek(0)
+    h = hashlib.sha256()
+    for block in iter(lambda: uploaded_file.read(1024 * 1024), b''):
+        h.update(block)
+    uploaded_file.seek(0)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def pipeline_version() -> str:
+    """Hash do código de leitura/normalização (PIPELINE_MODULES)."""
+    h = hashlib.sha256()
+    base = Path(__file__).parent
+    for name in PIPELINE_MODULES:
+        h.update((base / name).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def variant_key(digest: str, **options) -> str:
+    """
+    Chave de cache de uma leitura específica do arquivo: hash do conteúdo, versão do
+    pipeline e opções de leitura (ex.: aba e linha de cabeçalho do XLSX). A mesma planilha
+    lida com outras opções, ou por outra versão do código, vira outra entrada.
+    """
+    spec = '|'.join(f"{k}={options[k]!r}" for k in sorted(options))
+    return hashlib.sha256(f"{digest}|{pipeline_version()}|{spec}".encode('utf-8')).hexdigest()
+
+
+def disk_cache_dir():
+    """Pasta do cache em Parquet definida em RENTAL_UPLOAD_CACHE_DIR, ou None (só memória)."""
+    value = os.environ.get(DISK_CACHE_ENV, '').strip()
+    return Path(value).expanduser() if value else None
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UploadCache:
+    """
+    Cache LRU dos DataFrames já normalizados e tipados, indexado por variant_key().
+    Mantém `max_entries` em memória e, opcionalmente, até `max_disk_entries` em Parquet —
+    uma planilha XLSX é convertida uma vez e as próximas cargas leem o Parquet.
+    """
+
+    def __init__(self, max_entries: int = 4, disk_dir=None, max_disk_entries: int = 32):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        # Compartilhado entre sessões (st.cache_resource): o LRU é alterado sob lock
+        self._lock = threading.Lock()
+        self.disk_dir = Path(disk_dir) if disk_dir is not None and _parquet_available() else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.parquet"
+
+    def get(self, key: str):
+        """Retorna o DataFrame em cache (ou None). Promove a entrada para a mais recente."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            if path.exists():
+                try:
+                    df = pd.read_parquet(path)
+                except Exception as e:
+                    logger.warning("Cache em disco inválido (%s): %s", path.name, e)
+                    path.unlink(missing_ok=True)
+                    return None
+                path.touch()
+                self._remember(key, df)
+                return df
+        return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        """Guarda o DataFrame em memória e, se habilitado, em disco."""
+        self._remember(key, df)
+        if self.disk_dir is not None:
+            # Grava num temporário e renomeia: outra sessão nunca lê um Parquet pela metade
+            tmp = self.disk_dir / f"{key}.{threading.get_ident()}.tmp"
+            try:
+                df.to_parquet(tmp, index=False)
+                tmp.replace(self._disk_path(key))
+            except Exception as e:
+                # Colunas com tipos mistos não são serializáveis: o cache em memória continua valendo
+                logger.warning("Não foi possível gravar o cache em disco: %s", e)
+                tmp.unlink(missing_ok=True)
+                return
+            self._evict_disk()
+
+    def _remember(self, key, df):
+        with self._lock:
+            self._memory[key] = df
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        files = []
+        for path in self.disk_dir.glob('*.parquet'):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue   # removido por outra sessão
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_disk_entries)]:
+            path.unlink(missing_ok=True)